@@ -0,0 +1,195 @@
+from rng import as_stream
+import numpy as np
+import os
+
+# Columns stored for every state and their on-disk type
+COLUMNS = (('x', np.int32), ('y', np.int32),
+           ('h_speed', np.int16), ('v_speed', np.int16),
+           ('angle', np.int8), ('power', np.int8), ('fuel', np.int32))
+RETENTIONS = ("all", "every", "top", "none")
+RECORD_POLICIES = ("top", "sample")
+
+
+def record_members(policy, fitness, count, rng=None):
+    """Index of the members whose whole trajectory is recorded
+    - policy: "top" (count best members), "sample" (count members drawn
+      at random from rng), a list of member indices or a function
+      policy(fitness, count) -> indices
+    """
+    fitness = np.asarray(fitness, dtype=float)
+    count = min(count, len(fitness))
+    if callable(policy):
+        members = policy(fitness, count)
+    elif isinstance(policy, str):
+        if policy not in RECORD_POLICIES:
+            raise ValueError(f'Unknown record policy: {policy}')
+        if policy == "top":
+            members = np.argpartition(-fitness, count - 1)[:count]
+        else:
+            members = as_stream(rng).choice(len(fitness), count,
+                                            replace=False)
+    else:
+        members = [i for i in policy if 0 <= i < len(fitness)]
+    return np.unique(np.asarray(members, dtype=np.int64))
+
+
+class GenerationRecord():
+    """Trajectories of one generation as (members x ticks) arrays
+    - members: index of each stored member in its population
+    - fitness, flystate, lengths: one value per stored member
+    - columns are padded after the end of each trajectory,
+      they are memory-mapped when the archive spills to disk
+    """
+    def __init__(self, generation, members, fitness, flystate, lengths,
+                 columns):
+        self.generation = generation
+        self.members = members
+        self.fitness = fitness
+        self.flystate = flystate
+        self.lengths = lengths
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.members)
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def trajectory(self, i):
+        """x and y arrays of the i-th stored member"""
+        length = self.lengths[i]
+        return self.columns['x'][i, :length], self.columns['y'][i, :length]
+
+    def trajectories(self):
+        for i in range(len(self)):
+            yield self.trajectory(i)
+
+
+class TrajectoryArchive():
+    """Compact columnar store of the trajectories of a run
+    - retention: "all" generations, "every" Nth generation,
+      only the "top" k members of each generation, or "none"
+    - every: N for "every"
+    - top_k: number of best members kept for "top"
+    - path: file the columns are appended to, read back through
+      np.memmap, None to keep everything in memory
+    """
+    def __init__(self, retention="all", every=1, top_k=10, path=None):
+        if retention not in RETENTIONS:
+            raise ValueError(f'Unknown retention: {retention}')
+        self.retention = retention
+        self.every = every
+        self.top_k = top_k
+        self.path = path
+        self.records = []
+        if path is not None:
+            open(path, 'wb').close()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __getitem__(self, i):
+        return self.records[i]
+
+    def keeps(self, generation):
+        if self.retention == "every":
+            return generation % self.every == 0
+        return self.retention != "none"
+
+    def select(self, fitness):
+        """Index of the members kept for a generation"""
+        if self.retention == "top" and self.top_k < len(fitness):
+            best = np.argpartition(-fitness, self.top_k - 1)[:self.top_k]
+            return np.sort(best)
+        return np.arange(len(fitness))
+
+    def add_result(self, generation, result, members=None):
+        """Store a generation from a BatchResult with recorded history
+        - members: population index of every member of the result,
+          when it only holds some members of the generation
+        """
+        if (not self.keeps(generation) or result.history is None
+                or len(result.fitness) == 0):
+            return
+        rows = self.select(result.fitness)
+        lengths = result.lengths[rows]
+        width = int(lengths.max())
+        h = result.history
+        source = {'x': h['x'], 'y': h['y'], 'h_speed': np.round(h['vx']),
+                  'v_speed': np.round(h['vy']), 'angle': h['angle'],
+                  'power': h['power'], 'fuel': h['fuel']}
+        columns = {}
+        for name, dtype in COLUMNS:
+            columns[name] = source[name][:width, rows].T.astype(dtype)
+        if members is not None:
+            members = np.asarray(members)[rows]
+        else:
+            members = rows
+        self.store(generation, members, result.fitness[rows],
+                   result.flystate[rows], lengths, columns)
+
+    def add_landers(self, generation, landers, members=None):
+        """Store a generation from Lander objects
+        - members: population index of every lander, as in add_result
+        """
+        if not self.keeps(generation) or not landers:
+            return
+        fitness = np.array([lander.fitness for lander in landers])
+        rows = self.select(fitness)
+        trajectories = [landers[i].trajectory for i in rows]
+        lengths = np.array([len(t) for t in trajectories], dtype=np.int64)
+        width = int(lengths.max())
+        columns = {name: np.zeros((len(rows), width), dtype=dtype)
+                   for name, dtype in COLUMNS}
+        for i, trajectory in enumerate(trajectories):
+            values = [(s.position.x, s.position.y, s.speed.h_speed,
+                       s.speed.v_speed, s.angle, s.power, s.fuel)
+                      for s in trajectory]
+            values = np.array(values).T
+            for j, (name, dtype) in enumerate(COLUMNS):
+                columns[name][i, :len(trajectory)] = values[j]
+        flystate = np.array([landers[i].flystate.value for i in rows],
+                            dtype=np.int8)
+        if members is not None:
+            members = np.asarray(members)[rows]
+        else:
+            members = rows
+        self.store(generation, members, fitness[rows], flystate, lengths,
+                   columns)
+
+    def store(self, generation, members, fitness, flystate, lengths,
+              columns):
+        if self.path is not None:
+            columns = self.spill(columns)
+        self.records.append(GenerationRecord(generation, members, fitness,
+                                             flystate, lengths, columns))
+
+    def spill(self, columns):
+        """Append the columns to the archive file, return memmaps on them"""
+        mapped = {}
+        with open(self.path, 'ab') as f:
+            for name, array in columns.items():
+                offset = f.tell()
+                f.write(np.ascontiguousarray(array).tobytes())
+                mapped[name] = (offset, array.dtype, array.shape)
+        for name, (offset, dtype, shape) in mapped.items():
+            if 0 in shape:
+                mapped[name] = np.zeros(shape, dtype=dtype)
+            else:
+                mapped[name] = np.memmap(self.path, dtype=dtype, mode='r',
+                                         offset=offset, shape=shape)
+        return mapped
+
+    def nbytes(self):
+        """Size of the stored columns"""
+        return sum(array.nbytes for record in self.records
+                   for array in record.columns.values())
+
+    def close(self):
+        """Drop the records and remove the archive file"""
+        self.records = []
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,272 @@
+"""Benchmark suite of the simulation, the genetic operators and the
+generation throughput
+
+    python benchmark.py --output results.json
+    python benchmark.py --quick --compare results.json
+
+Every case is run on the scenarios of scenarios.py for the given
+population sizes and gene lengths, the median of the repeats is kept.
+Results are written as JSON, --compare prints the ratio of every
+case against a previous results file.
+
+The import time of the core modules is measured in fresh interpreters
+and checked against IMPORT_BUDGET: worker processes and short jobs
+should not pay for matplotlib, which only replay.py imports
+"""
+from population import Population
+from chromosome import Chromosome
+from lander import State, Lander
+from plane import Point, Vector
+from motion import Speed, Particle
+from scenarios import SCENARIOS
+from rng import RandomStream
+import numpy as np
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# modules a process needs to simulate and evolve a population
+CORE_MODULES = ('plane', 'motion', 'lander', 'chromosome', 'population')
+IMPORT_BUDGET = 0.25  # seconds to import CORE_MODULES, NumPy included
+# packages the core must not import
+PLOTTING = ('matplotlib', 'PIL')
+
+
+def measure(function, repeat):
+    """Median and minimum wall time of repeat calls of function"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), min(timings)
+
+
+def init_state(scenario):
+    x, y = scenario.init_position
+    return State(scenario.fuel, 0, 0, Particle(Point(x, y),
+                                               Speed(Vector(0, 0))))
+
+
+def make_population(scenario, pop_size, gene_size, engine, rng):
+    population = Population(gene_size, 0.08, pop_size, rng=rng)
+    population.engine = engine
+    population.archive.retention = "none"
+    population.simulate(scenario.init_position, scenario.fuel,
+                        scenario.ground_points)
+    population.calculate_fitness()
+    return population
+
+
+def bench_lander(scenario, pop_size, gene_size, engine, repeat, rng):
+    """Lander construction (trajectory and fitness) of one member,
+    compute_trajectory (State objects) and integrate (local floats) alone
+    """
+    population = make_population(scenario, pop_size, gene_size, engine,
+                                 rng)
+    terrain = population.get_terrain(scenario.ground_points)
+    state = init_state(scenario)
+    commands = population.member_commands(population.pool[0])
+    lander = Lander(state, commands, terrain)
+
+    def compute_trajectory():
+        lander.trajectory = [state]
+        lander.compute_trajectory()
+
+    return {'lander': measure(lambda: Lander(state, commands, terrain),
+                              repeat),
+            'compute_trajectory': measure(compute_trajectory, repeat),
+            'integrate': measure(lander.integrate, repeat)}
+
+
+def bench_chromosome(scenario, pop_size, gene_size, engine, repeat, rng):
+    """Chromosome.crossover and mutate of standalone chromosomes"""
+    parent_a = Chromosome(gene_size, rng=rng)
+    parent_b = Chromosome(gene_size, rng=rng)
+    child = Chromosome(gene_size, rng=rng)
+    return {'chromosome_crossover': measure(
+                lambda: parent_a.crossover(parent_b, rng), repeat),
+            'chromosome_mutate': measure(lambda: child.mutate(0.08, rng),
+                                         repeat)}
+
+
+def bench_population(scenario, pop_size, gene_size, engine, repeat, rng):
+    """selection, next_generation, simulate and a full generation"""
+    population = make_population(scenario, pop_size, gene_size, engine,
+                                 rng)
+
+    def next_generation():
+        population.selection()
+        population.next_generation()
+
+    def simulate():
+        population.simulate(scenario.init_position, scenario.fuel,
+                            scenario.ground_points)
+
+    def generation():
+        population.selection()
+        population.next_generation()
+        population.simulate(scenario.init_position, scenario.fuel,
+                            scenario.ground_points)
+        population.calculate_fitness()
+
+    results = {'selection': measure(population.selection, repeat)}
+    results['next_generation'] = measure(next_generation, repeat)
+    results['simulate'] = measure(simulate, repeat)
+    population.calculate_fitness()
+    results['generation'] = measure(generation, repeat)
+    population.close()
+    return results
+
+
+BENCHMARKS = {
+    "lander": bench_lander,
+    "chromosome": bench_chromosome,
+    "population": bench_population,
+}
+
+
+def import_time(modules=CORE_MODULES, repeat=5):
+    """Median and minimum time to import the modules in a fresh
+    interpreter, and the PLOTTING packages they pulled in
+    """
+    code = ("import sys, time\n"
+            "start = time.perf_counter()\n"
+            f"import {', '.join(modules)}\n"
+            "print(time.perf_counter() - start)\n"
+            "print(' '.join(sorted(sys.modules)))\n")
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True).stdout.splitlines()
+        timings.append(float(output[0]))
+    loaded = {name.split('.')[0] for name in output[1].split()}
+    return (statistics.median(timings), min(timings),
+            [name for name in PLOTTING if name in loaded])
+
+
+def commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scenarios, pop_sizes, gene_sizes, engine="object", repeat=5,
+        benchmarks=None, seed=0):
+    """Run the benchmarks, return a JSON-serializable report
+    - every case: name, scenario, pop_size, gene_size, median and min
+      time in seconds, and per_second (1 / median)
+    - seed: root of the RandomStream of every benchmark
+    """
+    stream = RandomStream(seed)
+    import_median, import_min, plotting = import_time(repeat=repeat)
+    cases = [{'name': 'import_core', 'scenario': None, 'pop_size': None,
+              'gene_size': None, 'engine': None, 'median': import_median,
+              'min': import_min, 'per_second': 1 / import_median}]
+    for name in benchmarks or BENCHMARKS:
+        for scenario in scenarios:
+            for pop_size in pop_sizes:
+                for gene_size in gene_sizes:
+                    rng = stream.spawn(1)[0]
+                    timings = BENCHMARKS[name](SCENARIOS[scenario], pop_size,
+                                               gene_size, engine, repeat, rng)
+                    for case, (median, best) in timings.items():
+                        cases.append({'name': case,
+                                      'scenario': scenario,
+                                      'pop_size': pop_size,
+                                      'gene_size': gene_size,
+                                      'engine': engine,
+                                      'median': median,
+                                      'min': best,
+                                      'per_second': 1 / median})
+    return {'commit': commit(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'repeat': repeat,
+            'imports': {'modules': list(CORE_MODULES),
+                        'median': import_median,
+                        'budget': IMPORT_BUDGET, 'plotting': plotting},
+            'cases': cases}
+
+
+def case_key(case):
+    return (case['name'], case['scenario'], case['pop_size'],
+            case['gene_size'], case['engine'])
+
+
+def compare(previous, current):
+    """Lines of (case, previous median, current median, ratio),
+    a ratio above 1 is a slowdown
+    """
+    before = {case_key(case): case for case in previous['cases']}
+    lines = []
+    for case in current['cases']:
+        old = before.get(case_key(case))
+        if old is not None:
+            lines.append((case_key(case), old['median'], case['median'],
+                          case['median'] / old['median']))
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS),
+                        choices=list(SCENARIOS))
+    parser.add_argument('--pop-sizes', nargs='+', type=int,
+                        default=[50, 200, 1000])
+    parser.add_argument('--gene-sizes', nargs='+', type=int,
+                        default=[50, 100, 200])
+    parser.add_argument('--engine', default="object",
+                        choices=["object", "batch", "parallel"])
+    parser.add_argument('--benchmarks', nargs='+', default=list(BENCHMARKS),
+                        choices=list(BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--quick', action='store_true',
+                        help='default scenario, small sizes, 3 repeats')
+    parser.add_argument('--compare', help='previous results file')
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET,
+                        help='seconds allowed to import the core modules')
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.scenarios, args.pop_sizes = ["default"], [50]
+        args.gene_sizes, args.repeat = [100], 3
+
+    report = run(args.scenarios, args.pop_sizes, args.gene_sizes,
+                 args.engine, args.repeat, args.benchmarks, args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=1)
+    for case in report['cases']:
+        print(f"{case['name']:>20} {case['scenario']!s:>13} "
+              f"pop={case['pop_size']!s:<5} genes={case['gene_size']!s:<4} "
+              f"{case['median'] * 1000:10.3f} ms")
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        for key, old, new, ratio in compare(previous, report):
+            print(f"{' '.join(map(str, key)):>50} "
+                  f"{old * 1000:10.3f} -> {new * 1000:10.3f} ms x{ratio:.2f}")
+    imports = report['imports']
+    if imports['plotting'] or imports['median'] > args.import_budget:
+        print(f"Core import over budget: {imports['median'] * 1000:.0f} ms "
+              f"(budget {args.import_budget * 1000:.0f} ms), plotting "
+              f"packages imported: {imports['plotting']}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
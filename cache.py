@@ -0,0 +1,119 @@
+from lander import FlyState
+from engine import BatchResult
+from collections import OrderedDict
+import numpy as np
+
+# values of the last state kept by an Outcome, as in BatchResult.final
+FINAL = ('x', 'y', 'h_speed', 'v_speed', 'angle', 'power', 'fuel')
+
+
+class Outcome():
+    """Outcome of one member flight as stored by the cache: scalars
+    copied out of the Lander or BatchResult, so a cache entry never
+    keeps a trajectory or a whole generation alive
+    - fitness, flystate (FlyState), ticks (commands flown)
+    - final: dict of the values of the last state, see FINAL
+    Exposes the attributes of a Lander that Population reads
+    """
+    __slots__ = ('fitness', 'flystate', 'ticks', 'final')
+
+    def __init__(self, fitness, flystate, ticks, final):
+        self.fitness = fitness
+        self.flystate = flystate
+        self.ticks = ticks
+        self.final = final
+
+    @classmethod
+    def from_lander(cls, lander):
+        state = lander.get_state(-1)
+        final = {'x': state.position.x, 'y': state.position.y,
+                 'h_speed': state.speed.h_speed,
+                 'v_speed': state.speed.v_speed, 'angle': state.angle,
+                 'power': state.power, 'fuel': state.fuel}
+        return cls(lander.fitness, lander.flystate, lander.ticks, final)
+
+    @classmethod
+    def from_result(cls, result, index):
+        final = None
+        if result.final is not None:
+            final = {key: result.final[key][index].item() for key in FINAL}
+        return cls(float(result.fitness[index]),
+                   result.get_flystate(index),
+                   int(result.lengths[index]) - 1, final)
+
+
+def outcomes_result(outcomes):
+    """BatchResult of cached outcomes, without history or checkpoints"""
+    final = None
+    if all(outcome.final is not None for outcome in outcomes):
+        final = {key: np.array([outcome.final[key] for outcome in outcomes])
+                 for key in FINAL}
+    return BatchResult(
+        np.array([outcome.fitness for outcome in outcomes]),
+        np.array([outcome.flystate.value for outcome in outcomes],
+                 dtype=np.int8),
+        np.array([outcome.ticks + 1 for outcome in outcomes],
+                 dtype=np.int64),
+        final, None)
+
+
+class FitnessCache():
+    """Bounded LRU cache of simulation outcomes (see Outcome)
+    keyed by scenario identity and genome bytes
+    - max_size: number of outcomes kept, the least recently used
+      outcome is evicted first
+    - hits, misses: counters over the whole run
+    - last_hits, last_misses: counters of the last generation
+    - history: (hits, misses) of every generation
+    """
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.last_hits = 0
+        self.last_misses = 0
+        self.history = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    @staticmethod
+    def scenario_key(ground_points, init_position, fuel, physics, kind):
+        """Identity of a scenario, kind tells which outcome type is stored"""
+        return (tuple(ground_points), tuple(init_position), fuel, physics,
+                kind)
+
+    @staticmethod
+    def key(scenario, genes):
+        """genes: the (gene_size x 2) int8 array of one member"""
+        return (scenario, genes.tobytes())
+
+    def get(self, key):
+        outcome = self.entries.get(key)
+        if outcome is not None:
+            self.entries.move_to_end(key)
+        return outcome
+
+    def put(self, key, outcome):
+        self.entries[key] = outcome
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def record(self, hits, misses):
+        """Count the lookups of one generation"""
+        self.last_hits, self.last_misses = hits, misses
+        self.hits += hits
+        self.misses += misses
+        self.history.append((hits, misses))
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self.entries.clear()
@@ -0,0 +1,68 @@
+"""Binary checkpoints of a Population
+
+A checkpoint is one compressed .npz file holding the gene pool arrays,
+the NumPy global RNG state as an array and a JSON string with the
+generation counter, the parameters and the state of the population
+RandomStream when it is seeded
+"""
+from population import Population
+from chromosome import GenePool
+from rng import RandomStream
+import numpy as np
+import json
+import os
+
+# Population attributes saved with the genomes
+PARAMETERS = ('population_size', 'gene_size', 'mutation_rate',
+              'elitism_ratio', 'selection_strategy', 'engine', 'physics',
+              'workers', 'chunk_size', 'checkpoint_every', 'generations',
+              'evolved', 'live_margin')
+
+
+def save_checkpoint(population, path):
+    """Write population to path, atomically replacing an older file"""
+    parameters = {name: getattr(population, name) for name in PARAMETERS}
+    if callable(parameters['selection_strategy']):
+        raise ValueError('Only a named selection strategy can be saved')
+    name, keys, position, has_gauss, cached_gaussian = np.random.get_state()
+    meta = {'parameters': parameters,
+            'numpy_rng': [name, position, has_gauss, cached_gaussian],
+            'stream': population.rng.get_state()}
+    pool = population.pool
+    arrays = {}
+    if pool.live is not None:
+        arrays['live'] = pool.live
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        np.savez_compressed(f, genes=pool.genes, fitness=pool.fitness,
+                            origin=pool.origin, divergence=pool.divergence,
+                            numpy_rng_keys=keys,
+                            meta=np.array(json.dumps(meta)), **arrays)
+    os.replace(temporary, path)
+
+
+def load_checkpoint(path, restore_rng=True):
+    """Population saved by save_checkpoint, ready for its next selection
+    - restore_rng: also restore the population RandomStream, or the
+      global NumPy state it draws from, so that the run continues
+      exactly as if it was never stopped
+    """
+    with np.load(path) as data:
+        meta = json.loads(str(data['meta']))
+        pool = GenePool(data['genes'], data['fitness'], data['origin'],
+                        data['divergence'],
+                        data['live'] if 'live' in data else None)
+        keys = data['numpy_rng_keys']
+    parameters = meta['parameters']
+    population = Population(parameters['gene_size'],
+                            parameters['mutation_rate'],
+                            parameters['population_size'], pool=pool)
+    for name, value in parameters.items():
+        setattr(population, name, value)
+    population.population_fitness = pool.fitness.tolist()
+    if restore_rng:
+        population.rng = RandomStream.from_state(meta.get('stream'))
+        name, position, has_gauss, cached_gaussian = meta['numpy_rng']
+        np.random.set_state((name, keys, position, has_gauss,
+                             cached_gaussian))
+    return population
@@ -1,5 +1,6 @@
-import random
+from rng import as_stream
 from collections import namedtuple
+import numpy as np
 
 CMD_TUPLE = namedtuple("Command", ["angle", "power"])
 
@@ -12,32 +13,74 @@ def coerce_range(value, min_value, max_value):
     return value
 
 
+class Genes():
+    """List-like view of a (gene_size x 2) array of (angle, power),
+    items are read and written as CMD_TUPLE
+    """
+    def __init__(self, array):
+        self.array = array
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [CMD_TUPLE(int(a), int(p)) for a, p in self.array[i]]
+        return CMD_TUPLE(int(self.array[i, 0]), int(self.array[i, 1]))
+
+    def __setitem__(self, i, gene):
+        self.array[i] = (gene[0], gene[1])
+
+    def __iter__(self):
+        for a, p in self.array.tolist():
+            yield CMD_TUPLE(a, p)
+
+
 class Chromosome():
     """A class represents a chromosome as an array
     of pairs(angle, power (thrust))
-    - angle : -90, -75, ... , 0, +15, +30, ..., +75, +90
+    - angle : -90, -75, ... , 0, +15, +30, ..., +75, +90
     - power : 0, 1, 2, 3, 4
     - convert chromosome into a string
     - crossover: combine one chromosome with another
     - mutate chromosome
+    A chromosome is a thin view on one row of a GenePool,
+    Chromosome(gene_size) creates a standalone one
+    - rng: RandomStream, seed or None (global stream) of the random
+      operators, see rng.py
     """
-    def __init__(self, gene_size):
-        self.genes = []
-        self.size = gene_size
-        self.fitness = 0
-
-        self.genes.append(CMD_TUPLE(0, 0))  # Init values
-
-        # filling with random angle and power for initial population
-        # for each turn the actual value of the angle is limited
-        # to the value of the previous turn +/- 15° and power is
-        # the value of the previous turn +/-1 (min = 0, max = 4)
-        for i in range(1, self.size):
-            angle = coerce_range(
-                self.genes[i-1].angle + random.randint(-15, 15), -90, 90)
-            power = coerce_range(
-                self.genes[i-1].power + random.randint(-1, 1), 0, 4)
-            self.genes.append(CMD_TUPLE(angle, power))
+    def __init__(self, gene_size, pool=None, index=0, rng=None):
+        if pool is None:
+            pool = GenePool(np.zeros((1, gene_size, 2), dtype=np.int8))
+            self.pool, self.index = pool, 0
+            self.genes = Genes(pool.genes[0])
+            self.genes[0] = CMD_TUPLE(0, 0)  # Init values
+
+            # filling with random angle and power for initial population
+            # for each turn the actual value of the angle is limited
+            # to the value of the previous turn +/- 15° and power is
+            # the value of the previous turn +/-1 (min = 0, max = 4)
+            rng = as_stream(rng)
+            angle_steps = rng.integers(-15, 16, gene_size - 1).tolist()
+            power_steps = rng.integers(-1, 2, gene_size - 1).tolist()
+            for i in range(1, gene_size):
+                angle = coerce_range(
+                    self.genes[i-1].angle + angle_steps[i-1], -90, 90)
+                power = coerce_range(
+                    self.genes[i-1].power + power_steps[i-1], 0, 4)
+                self.genes[i] = CMD_TUPLE(angle, power)
+        else:
+            self.pool, self.index = pool, index
+            self.genes = Genes(pool.genes[index])
+        self.size = len(self.genes)
+
+    @property
+    def fitness(self):
+        return float(self.pool.fitness[self.index])
+
+    @fitness.setter
+    def fitness(self, value):
+        self.pool.fitness[self.index] = value
 
     def __str__(self):
         info = "Gene sequence (angle, power): "
@@ -48,14 +91,16 @@ class Chromosome():
     def __len__(self):
         return len(self.genes)
 
-    def crossover(self, partner):
+    def crossover(self, partner, rng=None):
         """Combine by taking part from one parent and part from another
         based on weight (random number)
         """
-        weight = random.random()
+        weight = float(as_stream(rng).random())
         weight_compl = 1 - weight
-        child1 = Chromosome(len(self.genes))
-        child2 = Chromosome(len(self.genes))
+        # every gene but the first (0, 0) one is set below
+        shape = (1, len(self.genes), 2)
+        child1 = Chromosome(None, GenePool(np.zeros(shape, dtype=np.int8)))
+        child2 = Chromosome(None, GenePool(np.zeros(shape, dtype=np.int8)))
 
         for i in range(1, len(self.genes)):
             w_angle = int(self.genes[i].angle * weight
@@ -71,12 +116,175 @@ class Chromosome():
             child2.genes[i] = CMD_TUPLE(w_angle, w_power)
         return (child1, child2)
 
-    def mutate(self, mutation_rate):
+    def mutate(self, mutation_rate, rng=None):
         """Change angle and power based on a mutation probability"""
-        for i in range(len(self.genes)):
-            if random.random() < mutation_rate:
-                new_angle = coerce_range(
-                    self.genes[i].angle + random.randint(-15, 15), -90, 90)
-                new_power = coerce_range(
-                    self.genes[i].power + random.randint(-1, 1), 0, 4)
-                self.genes[i] = (CMD_TUPLE(new_angle, new_power))
+        rng = as_stream(rng)
+        mutated = np.flatnonzero(rng.random(len(self.genes)) < mutation_rate)
+        angle_steps = rng.integers(-15, 16, len(mutated)).tolist()
+        power_steps = rng.integers(-1, 2, len(mutated)).tolist()
+        for i, angle_step, power_step in zip(mutated.tolist(), angle_steps,
+                                             power_steps):
+            new_angle = coerce_range(
+                self.genes[i].angle + angle_step, -90, 90)
+            new_power = coerce_range(
+                self.genes[i].power + power_step, 0, 4)
+            self.genes[i] = (CMD_TUPLE(new_angle, new_power))
+
+
+class GenePool():
+    """Genes of a whole population in a single array
+    - genes: int8 array (pop_size x gene_size x 2) of (angle, power)
+    - fitness: float array (pop_size)
+    - origin: index in the previous pool of the parent each member
+      shares the longest gene prefix with, -1 for none
+    - divergence: first gene index that differs from that parent
+      (gene_size when all genes are the same)
+    - live: genes the flight of each member used, None when unknown;
+      with a live_margin crossover and mutation only work on the first
+      live + live_margin genes, the other ones never changed the flight
+    - first: first gene crossover blends, 1 while gene 0 is the (0, 0)
+      start of the random walks, 0 once shift() made it the next
+      command to fly
+    - crossover and mutation work on all members at once, drawing
+      the random numbers of the whole pool in one call per operator
+      from rng (a RandomStream, a seed or None for the global stream)
+    """
+    def __init__(self, genes, fitness=None, origin=None, divergence=None,
+                 live=None, first=1):
+        self.genes = np.asarray(genes, dtype=np.int8)
+        if fitness is None:
+            fitness = np.zeros(len(self.genes))
+        self.fitness = np.asarray(fitness, dtype=float)
+        if origin is None:
+            origin = np.full(len(self.genes), -1, dtype=np.int64)
+        self.origin = np.asarray(origin, dtype=np.int64)
+        if divergence is None:
+            divergence = np.zeros(len(self.genes), dtype=np.int64)
+        self.divergence = np.asarray(divergence, dtype=np.int64)
+        if live is not None:
+            live = np.asarray(live, dtype=np.int64)
+        self.live = live
+        self.first = first
+
+    def live_limit(self, live, live_margin):
+        """Genes worked on from the live lengths, None for all of them"""
+        if live_margin is None or live is None:
+            return None
+        return np.minimum(live + live_margin, self.genes.shape[1])
+
+    @classmethod
+    def random(cls, pop_size, gene_size, rng=None):
+        """Random walks starting at (0, 0), same rules as Chromosome"""
+        rng = as_stream(rng)
+        genes = np.zeros((pop_size, gene_size, 2), dtype=np.int8)
+        angle = np.zeros(pop_size, dtype=np.int64)
+        power = np.zeros(pop_size, dtype=np.int64)
+        for i in range(1, gene_size):
+            angle = np.clip(angle + rng.integers(-15, 16, pop_size), -90, 90)
+            power = np.clip(power + rng.integers(-1, 2, pop_size), 0, 4)
+            genes[:, i, 0] = angle
+            genes[:, i, 1] = power
+        return cls(genes)
+
+    def __len__(self):
+        return len(self.genes)
+
+    def __getitem__(self, index):
+        return Chromosome(None, self, index)
+
+    def members(self):
+        return [Chromosome(None, self, i) for i in range(len(self))]
+
+    def take(self, indices):
+        """New pool with a copy of the given members"""
+        live = None if self.live is None else self.live[indices]
+        return GenePool(self.genes[indices], self.fitness[indices],
+                        self.origin[indices], self.divergence[indices], live,
+                        self.first)
+
+    @staticmethod
+    def first_difference(genes, others):
+        """First gene index where genes and others differ, per member"""
+        differ = np.any(genes != others, axis=2)
+        return np.where(differ.any(axis=1), differ.argmax(axis=1),
+                        genes.shape[1])
+
+    def crossover(self, parents_a, parents_b, rng=None, live_margin=None):
+        """Weighted crossover of every (parents_a[i], parents_b[i]) pair,
+        same arithmetic as Chromosome.crossover
+        returns a new pool with the children of pair i at 2*i and 2*i + 1
+        - live_margin: only blend the genes up to the longer flight of
+          the parents plus live_margin, past them the first child keeps
+          the genes of parents_a[i] and the second those of parents_b[i]
+        """
+        live = None
+        if self.live is not None:
+            live = np.maximum(self.live[parents_a], self.live[parents_b])
+        limit = self.live_limit(live, live_margin)
+        used = self.genes.shape[1] if limit is None else int(limit.max())
+        first = self.first
+        genes_a = self.genes[parents_a, first:used].astype(float)
+        genes_b = self.genes[parents_b, first:used].astype(float)
+        weight = as_stream(rng).random(len(genes_a))[:, None, None]
+        weight_compl = 1 - weight
+
+        children = np.zeros((len(genes_a), 2) + self.genes.shape[1:],
+                            dtype=np.int8)
+        children[:, 0, first:used] = np.trunc(genes_a * weight
+                                              + genes_b * weight_compl)
+        children[:, 1, first:used] = np.trunc(genes_a * weight_compl
+                                              + genes_b * weight)
+        if limit is not None:
+            dead = np.arange(self.genes.shape[1]) >= limit[:, None]
+            children[:, 0][dead] = self.genes[parents_a][dead]
+            children[:, 1][dead] = self.genes[parents_b][dead]
+            live = np.repeat(live, 2)
+        else:
+            live = None
+        children = children.reshape((-1,) + self.genes.shape[1:])
+
+        # each child remembers the parent it shares the longest prefix with
+        parents_a = np.repeat(parents_a, 2)
+        parents_b = np.repeat(parents_b, 2)
+        divergence_a = self.first_difference(children, self.genes[parents_a])
+        divergence_b = self.first_difference(children, self.genes[parents_b])
+        from_a = divergence_a >= divergence_b
+        return GenePool(children, None,
+                        np.where(from_a, parents_a, parents_b),
+                        np.where(from_a, divergence_a, divergence_b), live,
+                        first)
+
+    def shift(self):
+        """Drop the first gene of every member in place, the last gene
+        is repeated to keep the gene size
+        """
+        self.genes[:, :-1] = self.genes[:, 1:]
+        self.fitness[:] = 0
+        self.origin[:] = -1
+        self.divergence[:] = 0
+        self.live = None
+        self.first = 0
+
+    def mutate(self, mutation_rate, rng=None, live_margin=None):
+        """Change angle and power of every member in place
+        based on a mutation probability
+        - live_margin: only mutate the first live + live_margin genes,
+          with the same probability per gene
+        """
+        rng = as_stream(rng)
+        limit = self.live_limit(self.live, live_margin)
+        used = self.genes.shape[1] if limit is None else int(limit.max())
+        mutated = rng.random((len(self.genes), used)) < mutation_rate
+        if limit is not None:
+            mutated &= np.arange(used) < limit[:, None]
+        count = np.count_nonzero(mutated)
+        genes = self.genes[:, :used].astype(np.int64)
+        genes[mutated, 0] = np.clip(
+            genes[mutated, 0] + rng.integers(-15, 16, count), -90, 90)
+        genes[mutated, 1] = np.clip(
+            genes[mutated, 1] + rng.integers(-1, 2, count), 0, 4)
+        changed = self.first_difference(genes, self.genes[:, :used])
+        # members without a change keep their divergence
+        changed[changed == used] = self.genes.shape[1]
+        self.divergence = np.minimum(self.divergence, changed)
+        self.genes[:, :used] = genes
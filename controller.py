@@ -0,0 +1,94 @@
+from population import Population
+from chromosome import coerce_range
+from archive import TrajectoryArchive
+from engine import genes_to_commands
+from lander import ControlCommands, State, FlyState
+from plane import Point, Vector
+from motion import Speed, Particle
+import numpy as np
+import time
+
+
+class Controller():
+    """Rolling-horizon controller: one command per game turn
+    - ground_points: terrain of the game, e.g. ["0 100", "1000 500", ...]
+    - first_budget, budget: seconds to decide on the first turn
+      and on the next ones
+    - the population is kept between turns, every genome is shifted
+      left by one gene (the command just played) instead of starting
+      again from random walks
+    - latencies, generations: decision time and generations
+      completed of every turn
+    - seed: seed of the population RandomStream, see rng.py
+    """
+    def __init__(self, ground_points, gene_size=60, pop_size=40,
+                 mutation_rate=0.08, first_budget=0.1, budget=0.015,
+                 engine="batch", seed=None):
+        self.ground_points = list(ground_points)
+        self.first_budget = first_budget
+        self.budget = budget
+        self.population = Population(gene_size, mutation_rate, pop_size,
+                                     rng=seed)
+        self.population.engine = engine
+        self.population.archive = TrajectoryArchive("none")
+        self.latencies = []
+        self.generations = []
+        self.landing = False  # did the best member of the last turn land
+
+    @staticmethod
+    def state_from_inputs(x, y, h_speed, v_speed, fuel, angle, power):
+        """State from the values the game gives every turn"""
+        return State(fuel, power, angle,
+                     Particle(Point(x, y), Speed(Vector(h_speed, v_speed))))
+
+    def decide(self, state):
+        """Next ControlCommands from the current State, evolving the
+        population until the time budget of the turn is spent
+        """
+        start = time.perf_counter()
+        budget = self.budget if self.latencies else self.first_budget
+        deadline = start + budget
+        population = self.population
+        population.simulate_state(state, self.ground_points)
+        population.calculate_fitness()
+        generations = 0
+        duration = time.perf_counter() - start
+        # stop when the next generation would likely miss the deadline
+        while time.perf_counter() + duration < deadline:
+            started = time.perf_counter()
+            population.selection()
+            population.next_generation()
+            population.simulate_state(state, self.ground_points)
+            population.calculate_fitness()
+            generations += 1
+            duration = time.perf_counter() - started
+
+        best = population.best_member()
+        self.landing = (population.simulations[best].flystate
+                        == FlyState.Landed)
+        angles, powers = genes_to_commands(
+            population.pool.genes[best:best + 1], (state.angle, state.power))
+        # the lander itself limits the change of angle and power per turn
+        command = ControlCommands(
+            state.angle + coerce_range(int(angles[0, 0]) - state.angle,
+                                       -15, 15),
+            state.power + coerce_range(int(powers[0, 0]) - state.power,
+                                       -1, 1))
+        population.pool.shift()
+        self.latencies.append(time.perf_counter() - start)
+        self.generations.append(generations)
+        return command
+
+    def stats(self):
+        """Decision latency (seconds) of the first turn, percentiles of
+        the next turns, and generations completed per turn
+        """
+        if not self.latencies:
+            return {}
+        latencies = np.array(self.latencies[1:] or self.latencies)
+        return {'turns': len(self.latencies),
+                'first_turn': self.latencies[0],
+                'p50': float(np.percentile(latencies, 50)),
+                'p99': float(np.percentile(latencies, 99)),
+                'max': float(latencies.max()),
+                'generations_per_turn': float(np.mean(self.generations))}
@@ -0,0 +1,396 @@
+from plane import Vector, Point
+from motion import Time, Speed, Particle
+from lander import State, FlyState, acceleration_rows
+from terrain import Terrain
+from lander import PHYSICS
+import fixedpoint
+from functools import lru_cache
+import numpy as np
+
+MIN_ANGLE, MAX_ANGLE = -90, 90
+MIN_POWER, MAX_POWER = 0, 4
+
+# FlyState values stored in the integer flystate arrays
+LANDED = FlyState.Landed.value
+CRASHED = FlyState.Crashed.value
+FLYING = FlyState.Flying.value
+
+# columns of BatchResult.history
+HISTORY = ('x', 'y', 'vx', 'vy', 'angle', 'power', 'fuel')
+
+
+@lru_cache(maxsize=None)
+def acceleration_table():
+    """Total acceleration (gravity + thrust) for every (angle, power) pair
+    The table holds acceleration_rows, built with the very same Vector
+    operations as Lander.compute_next_state, so a lookup is bit-identical
+    - shape: (181, 5, 2), indexed by [angle + 90, power, (dx, dy)]
+    """
+    table = np.array(acceleration_rows())
+    table.flags.writeable = False
+    return table
+
+
+def genes_to_commands(genes, previous=(0, 0)):
+    """Vectorized version of the command building in Population.simulate
+    genes: integer array (pop_size x gene_size x 2) of (angle, power)
+    previous: (angle, power) of the state the first command starts from
+    returns (angles, powers) arrays of shape (pop_size x gene_size)
+    """
+    genes = np.asarray(genes, dtype=np.int64)
+    start = previous
+    previous = np.empty_like(genes)
+    previous[:, 0] = start
+    previous[:, 1:] = genes[:, :-1]
+    commands = previous + np.clip(genes - previous, -15, 15)
+    return commands[..., 0], commands[..., 1]
+
+
+class BatchResult():
+    """Outcome of a batched simulation, one entry per member
+    - fitness: float array
+    - flystate: integer array of FlyState values
+    - lengths: number of states in each member trajectory
+    - final: dict of arrays with the last state of each member
+    - history: dict of (ticks + 1, pop_size) arrays or None
+    - checkpoints: dict of arrays with the whole engine state
+      every checkpoint_every ticks, or None
+    """
+    def __init__(self, fitness, flystate, lengths, final, history,
+                 checkpoints=None, checkpoint_every=None):
+        self.fitness = fitness
+        self.flystate = flystate
+        self.lengths = lengths
+        self.final = final
+        self.history = history
+        self.checkpoints = checkpoints
+        self.checkpoint_every = checkpoint_every
+
+    def __len__(self):
+        return len(self.fitness)
+
+    def get_flystate(self, index):
+        return FlyState(int(self.flystate[index]))
+
+    def get_trajectory(self, index):
+        """Rebuild the list of State objects of one member"""
+        if self.history is None:
+            raise ValueError('Trajectories were not recorded!')
+        h = self.history
+        trajectory = []
+        for t in range(int(self.lengths[index])):
+            speed = Speed(Vector(float(h['vx'][t, index]),
+                                 float(h['vy'][t, index])))
+            if t > 0:
+                speed.h_speed = round(speed.h_speed)
+                speed.v_speed = round(speed.v_speed)
+            position = Point(int(h['x'][t, index]), int(h['y'][t, index]))
+            trajectory.append(State(int(h['fuel'][t, index]),
+                                    int(h['power'][t, index]),
+                                    int(h['angle'][t, index]),
+                                    Particle(position, speed)))
+        return trajectory
+
+    def landers(self):
+        return [SimulatedLander(self, i) for i in range(len(self))]
+
+    @classmethod
+    def gather(cls, sources):
+        """New result whose member i is a copy of member sources[i]
+        sources: list of (BatchResult, index) pairs
+        """
+        pop_size = len(sources)
+        groups = {}
+        for i, (result, index) in enumerate(sources):
+            group = groups.setdefault(id(result), (result, [], []))
+            group[1].append(i)
+            group[2].append(index)
+        results = [group[0] for group in groups.values()]
+        if len(results) == 1 and groups[id(results[0])][2] == list(
+                range(len(results[0]))) and pop_size == len(results[0]):
+            # every member in place: nothing to copy
+            return results[0]
+
+        fitness = np.zeros(pop_size)
+        flystate = np.zeros(pop_size, dtype=np.int8)
+        lengths = np.zeros(pop_size, dtype=np.int64)
+        final = None
+        if all(result.final is not None for result in results):
+            final = {key: np.zeros(pop_size, value.dtype)
+                     for key, value in results[0].final.items()}
+        history = None
+        if all(result.history is not None for result in results):
+            ticks = max(len(result.history['x']) for result in results)
+            history = {key: np.zeros((ticks, pop_size), value.dtype)
+                       for key, value in results[0].history.items()}
+        checkpoints = None
+        every = results[0].checkpoint_every
+        if all(result.checkpoints is not None
+               and result.checkpoint_every == every for result in results):
+            rows = max(len(result.checkpoints['x']) for result in results)
+            checkpoints = {key: np.zeros((rows, pop_size), value.dtype)
+                           for key, value in results[0].checkpoints.items()}
+
+        for result, positions, indices in groups.values():
+            fitness[positions] = result.fitness[indices]
+            flystate[positions] = result.flystate[indices]
+            lengths[positions] = result.lengths[indices]
+            if final is not None:
+                for key in final:
+                    final[key][positions] = result.final[key][indices]
+            if history is not None:
+                for key in history:
+                    values = result.history[key][:, indices]
+                    history[key][:len(values), positions] = values
+            if checkpoints is not None:
+                for key in checkpoints:
+                    values = result.checkpoints[key][:, indices]
+                    checkpoints[key][:len(values), positions] = values
+        if checkpoints is None:
+            every = None
+        return cls(fitness, flystate, lengths, final, history, checkpoints,
+                   every)
+
+
+class SimulatedLander():
+    """Read-only view on one member of a BatchResult
+    which exposes the same attributes as Lander
+    """
+    def __init__(self, result, index):
+        self.result = result
+        self.index = index
+
+    @property
+    def fitness(self):
+        return float(self.result.fitness[self.index])
+
+    @property
+    def flystate(self):
+        return self.result.get_flystate(self.index)
+
+    @property
+    def ticks(self):
+        return int(self.result.lengths[self.index]) - 1
+
+    @property
+    def trajectory(self):
+        return self.result.get_trajectory(self.index)
+
+
+class BatchEngine():
+    """Advance all members of a population one tick at a time,
+    position, speed, angle, power and fuel are kept in NumPy arrays
+    The physics and the landing/crash checks follow Lander exactly,
+    Lander remains the reference implementation
+    - physics: "float" or "fixed", same as Lander
+    """
+    def __init__(self, ground, physics="float"):
+        if physics not in PHYSICS:
+            raise ValueError(f'Unknown physics: {physics}')
+        self.physics = physics
+        if not isinstance(ground, Terrain):
+            ground = Terrain(ground.points)
+        if ground.landing_zone is None:
+            raise ValueError('Ground should have a flat landing zone!')
+        self.ground = ground
+        if physics == "fixed":
+            self.acceleration = fixedpoint.thrust_table()
+        else:
+            self.acceleration = acceleration_table()
+
+    def simulate(self, init_state, angles, powers, time=Time(1),
+                 record=True, checkpoint_every=None, resume=None):
+        """Fly every member with its own commands
+        init_state: State shared by every member
+        angles, powers: integer arrays (pop_size x ticks) of commands
+        time: seconds per tick; a step of several seconds stands for as
+          many game turns, the angle and power changes allowed and the
+          fuel burnt scale with it (coarse flights, see fidelity.py)
+        checkpoint_every: keep the whole state of every member each
+          N ticks in result.checkpoints, children can resume from them
+        resume: dict to start members in the middle of their flight
+          - tick: state index each member starts from
+          - state: the state at that tick, same keys as checkpoints
+          - checkpoints, history: arrays of a full result, already
+            filled up to the starting tick
+        """
+        angles = np.asarray(angles, dtype=np.int64)
+        powers = np.asarray(powers, dtype=np.int64)
+        pop_size, ticks = angles.shape
+        if ticks == 0:
+            raise ValueError('Commands should have at least 1 tick!')
+        t = time.seconds
+        turns = max(1, int(round(t)))
+        ground = self.ground
+        fixed = self.physics == "fixed"
+
+        x = np.full(pop_size, float(init_state.position.x))
+        y = np.full(pop_size, float(init_state.position.y))
+        if fixed:
+            # x and y stay integral floats, speeds are fixed-point integers
+            x, y = np.round(x), np.round(y)
+            vx = np.full(pop_size, round(init_state.speed.direction.dx
+                                         * fixedpoint.ONE), dtype=np.int64)
+            vy = np.full(pop_size, round(init_state.speed.direction.dy
+                                         * fixedpoint.ONE), dtype=np.int64)
+        else:
+            vx = np.full(pop_size, float(init_state.speed.direction.dx))
+            vy = np.full(pop_size, float(init_state.speed.direction.dy))
+        hs = np.full(pop_size, float(init_state.speed.h_speed))
+        vs = np.full(pop_size, float(init_state.speed.v_speed))
+        angle = np.full(pop_size, init_state.angle, dtype=np.int64)
+        power = np.full(pop_size, init_state.power, dtype=np.int64)
+        fuel = np.full(pop_size, init_state.fuel, dtype=np.int64)
+        # arrays are updated in place, so state always holds the state
+        state = {'x': x, 'y': y, 'vx': vx, 'vy': vy, 'hs': hs, 'vs': vs,
+                 'angle': angle, 'power': power, 'fuel': fuel}
+        start = np.zeros(pop_size, dtype=np.int64)
+        if resume is not None:
+            start = np.asarray(resume['tick'], dtype=np.int64)
+            for key, value in resume['state'].items():
+                state[key][...] = value
+        flystate = np.full(pop_size, FLYING, dtype=np.int8)
+        lengths = start + 1
+        # state before the last one (trajectory[-2] in Lander)
+        prev = {'x': x.copy(), 'y': y.copy(), 'hs': hs.copy(),
+                'vs': vs.copy()}
+
+        history = None
+        if record and resume is not None:
+            if resume.get('history') is None:
+                raise ValueError('Resumed flights need the history prefix!')
+            history = resume['history']
+        elif record:
+            history = {}
+            for key in HISTORY:
+                dtype = float if key in ('vx', 'vy') else state[key].dtype
+                history[key] = np.zeros((ticks + 1, pop_size), dtype=dtype)
+            self.record(history, 0, slice(None), state)
+
+        checkpoints = None
+        if checkpoint_every:
+            if resume is not None and resume.get('checkpoints') is not None:
+                checkpoints = resume['checkpoints']
+            else:
+                checkpoints = {key: np.zeros((ticks // checkpoint_every + 1,
+                                              pop_size), value.dtype)
+                               for key, value in state.items()}
+
+        # members join the flight at their starting tick
+        order = np.argsort(start, kind='stable')
+        joined = 0
+        active = np.zeros(0, dtype=np.int64)
+        for tick in range(int(start.min()), ticks):
+            joining = np.searchsorted(start[order], tick, side='right')
+            if joining > joined:
+                active = np.concatenate((active, order[joined:joining]))
+                joined = joining
+            if checkpoints is not None and tick % checkpoint_every == 0:
+                started = order[:joined]
+                for key, value in state.items():
+                    checkpoints[key][tick // checkpoint_every,
+                                     started] = value[started]
+            if len(active) == 0:
+                if joined == pop_size:
+                    break
+                continue
+            prev['x'][active] = x[active]
+            prev['y'][active] = y[active]
+            prev['hs'][active] = hs[active]
+            prev['vs'][active] = vs[active]
+
+            a, p = angle[active], power[active]
+            new_angle = a + np.clip(angles[active, tick] - a,
+                                    -15 * turns, 15 * turns)
+            new_power = p + np.clip(powers[active, tick] - p, -turns, turns)
+            if (new_angle.min() < MIN_ANGLE or new_angle.max() > MAX_ANGLE
+                    or new_power.min() < MIN_POWER
+                    or new_power.max() > MAX_POWER):
+                raise ValueError('Angle or power out of range!')
+            acc = self.acceleration[new_angle - MIN_ANGLE, new_power]
+            ax, ay = acc[:, 0], acc[:, 1]
+
+            if fixed:
+                new_x, new_y, new_vx, new_vy = fixedpoint.accelerate(
+                    x[active].astype(np.int64), y[active].astype(np.int64),
+                    vx[active], vy[active], ax, ay, t)
+                new_x, new_y = new_x.astype(float), new_y.astype(float)
+                hs[active] = fixedpoint.round_div_array(new_vx,
+                                                        fixedpoint.ONE)
+                vs[active] = fixedpoint.round_div_array(new_vy,
+                                                        fixedpoint.ONE)
+            else:
+                new_x = np.round((x[active] + vx[active] * t)
+                                 + ax * t ** 2 * 0.5)
+                new_y = np.round((y[active] + vy[active] * t)
+                                 + ay * t ** 2 * 0.5)
+                new_vx = vx[active] + ax * t
+                new_vy = vy[active] + ay * t
+                hs[active], vs[active] = np.round(new_vx), np.round(new_vy)
+            new_fuel = fuel[active] - new_power * turns
+
+            x[active], y[active] = new_x, new_y
+            vx[active], vy[active] = new_vx, new_vy
+            angle[active], power[active] = new_angle, new_power
+            fuel[active] = new_fuel
+            lengths[active] += 1
+            if record:
+                self.record(history, tick + 1, active, state)
+
+            # evaluate_outside
+            outside = (new_x > ground.max_x) | (new_x < ground.min_x)
+            # evaluate_hit_the_ground (only for landers inside the map)
+            inside = np.flatnonzero(~outside)
+            segment = ground.segment_indices(new_x[inside])
+            if np.any(segment < 0):
+                raise ValueError('Lander is above a gap in the ground!')
+            below = np.zeros(len(active), dtype=bool)
+            below[inside] = ground.heights_at(new_x[inside]) > new_y[inside]
+            horizontal = np.zeros(len(active), dtype=bool)
+            horizontal[inside] = ground.horizontal[segment]
+            landed = (below & (new_angle == 0)
+                      & (np.abs(vs[active]) <= 40)
+                      & (np.abs(hs[active]) <= 20) & horizontal)
+            # evaluate_no_fuel
+            no_fuel = ~outside & ~below & (new_fuel <= 0)
+
+            flystate[active[landed]] = LANDED
+            flystate[active[outside | (below & ~landed) | no_fuel]] = CRASHED
+            active = active[~(outside | below | no_fuel)]
+
+        fitness = self.calculate_fitness(prev)
+        final = {'x': x, 'y': y, 'h_speed': hs, 'v_speed': vs,
+                 'angle': angle, 'power': power, 'fuel': fuel}
+        return BatchResult(fitness, flystate, lengths, final, history,
+                           checkpoints, checkpoint_every)
+
+    def record(self, history, tick, members, state):
+        """Copy the state of the given members into the history"""
+        for key in history:
+            value = state[key][members]
+            if key in ('vx', 'vy') and self.physics == "fixed":
+                value = value / fixedpoint.ONE
+            history[key][tick, members] = value
+
+    def calculate_fitness(self, last):
+        """Vectorized Lander.hit_landing_area and Lander.calculate_fitness
+        last: dict of arrays of the state before the last one
+        """
+        zone_a = self.ground.landing_zone[0]
+        hit = (self.ground.segment_indices(last['x'])
+               == self.ground.landing_index)
+
+        fitness = np.zeros(len(hit))
+        miss = ~hit
+        distance = np.sqrt((last['x'][miss] - zone_a.x) ** 2
+                           + (last['y'][miss] - zone_a.y) ** 2)
+        fitness[miss] = 1 / np.maximum(distance, 1)
+
+        h_speed, v_speed = last['hs'][hit], last['vs'][hit]
+        x_pen = np.where(np.abs(h_speed) > 20, np.abs(h_speed) - 20, 0)
+        y_pen = np.where(v_speed < -40, -40 - v_speed, 0)
+        penalty = x_pen + y_pen
+        safe = penalty == 0
+        fitness[hit] = np.where(safe, 1.0,
+                                1 - (1 / np.where(safe, 1, penalty)))
+        return fitness
@@ -1,15 +1,21 @@
 from population import Population
+from scenarios import SCENARIOS
+from checkpoint import save_checkpoint, load_checkpoint
+from termination import Termination, Landed
+import os
 
 
-def init():
+def init(store=None):
+    """Initial population, part of it seeded from the solutions
+    of similar scenarios when a SolutionStore is given
+    """
     gene_size = 100
     mutation_rate = 0.08
     pop_size = 200
     population = Population(gene_size, mutation_rate, pop_size)
-    ground_points = ["0 100", "1000 500", "1500 1500", "3000 1000",
-                     "4000 150", "5500 150", "6999 800"]
-    init_position = (2500, 2700)
-    fuel = 5000
+    ground_points, init_position, fuel = SCENARIOS["default"]
+    if store is not None:
+        store.seed(population, ground_points, init_position, fuel)
 
     # Compute trajectories and lander state,
     # for every member of the initial population
@@ -21,14 +27,21 @@ def init():
     return population
 
 
-def evolve(population):
-    """Find trajectory to the landing zone"""
-    ground_points = ["0 100", "1000 500", "1500 1500", "3000 1000",
-                     "4000 150", "5500 150", "6999 800"]
-    init_position = (2500, 2700)
-    fuel = 5000
-
-    while(not population.evolved):
+def evolve(population, checkpoint=None, checkpoint_interval=10,
+           store=None, criteria=None):
+    """Find trajectory to the landing zone
+    - checkpoint: file the population is saved to every
+      checkpoint_interval generations, see checkpoint.py
+    - store: SolutionStore the landing trajectory is added to
+    - criteria: stop criteria of termination.py, until a member
+      lands by default
+    Returns the best flight found, see Termination.result
+    """
+    ground_points, init_position, fuel = SCENARIOS["default"]
+    termination = Termination(criteria or [Landed()])
+    termination.start(population)
+
+    while termination.check(population) is None:
         # Generate parents array
         population.selection()
 
@@ -47,13 +60,28 @@ def evolve(population):
 
         print(population)
 
+        if (checkpoint is not None
+                and population.generations % checkpoint_interval == 0):
+            save_checkpoint(population, checkpoint)
+
+    result = termination.result(ground_points, init_position, fuel,
+                                population.physics)
+    if store is not None and result['flystate'] == "Landed":
+        store.add(ground_points, init_position, fuel, result['genes'],
+                  result['fitness'])
+
     # Plot the trajectory of every member of all populations
     population.display_all_populations_simulation()
+    return result
 
 
-def main():
-    population = init()
-    evolve(population)
+def main(checkpoint=None):
+    """Evolve from scratch, or from the checkpoint file if it exists"""
+    if checkpoint is not None and os.path.exists(checkpoint):
+        population = load_checkpoint(checkpoint)
+    else:
+        population = init()
+    evolve(population, checkpoint)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+"""Multi-fidelity evaluation: screen every member with a cheap coarse
+flight, then fly exactly only the promising ones
+
+    population.engine = "batch"
+    population.screening = "step"  # or "horizon"
+    population.simulate(init_position, fuel, ground_points)
+    summarize(population.screening_stats)
+
+- "step": ticks of step seconds, the commands sampled every step turns
+- "horizon": the exact physics, stopped after horizon turns
+Only an exact flight decides FlyState.Landed: a member that is not
+flown exactly keeps its coarse fitness and a Crashed or Flying state.
+The coarse flights always run on the BatchEngine, the exact ones on the
+engine of the population: screening saves the most where the cost grows
+with the members flown ("object" and "parallel" engines, large
+populations), the batch engine mostly pays per tick
+"""
+from motion import Time
+from engine import BatchResult, LANDED
+from selection import best_members
+import numpy as np
+
+SCREENINGS = ("step", "horizon")
+
+
+def coarse_flight(batch_engine, init_state, angles, powers, screening,
+                  step=4, horizon=30):
+    """BatchResult of the cheap flights of every member, no history"""
+    if screening == "step":
+        first = min(step, angles.shape[1]) - 1
+        return batch_engine.simulate(init_state, angles[:, first::step],
+                                     powers[:, first::step],
+                                     time=Time(step), record=False)
+    if screening == "horizon":
+        return batch_engine.simulate(init_state, angles[:, :horizon],
+                                     powers[:, :horizon], record=False)
+    raise ValueError(f'Unknown screening: {screening}')
+
+
+def candidates(coarse, ratio):
+    """Members flown exactly: the ratio of best coarse fitness, and
+    every member whose coarse flight landed
+    """
+    count = max(1, int(np.ceil(len(coarse) * ratio)))
+    top = best_members(coarse.fitness, count)
+    return np.union1d(top, np.flatnonzero(coarse.flystate == LANDED))
+
+
+def count_inversions(values):
+    """Pairs i < j with values[i] > values[j], by a bottom-up merge
+    sort whose merges are NumPy sorts of every block pair at once:
+    O(n log^2 n) time and O(n) memory
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    size = 1
+    while size < n:
+        size *= 2
+    # +inf padding after the values adds no inversion
+    blocks = np.full(size, np.inf)
+    blocks[:n] = values
+    inversions = 0
+    width = 1
+    while width < size:
+        blocks = blocks.reshape(-1, 2 * width)
+        # stable: on ties the left block comes first, so no inversion
+        order = np.argsort(blocks, axis=1, kind='stable')
+        position = np.argsort(order, axis=1)
+        # left values up to each right value, the right block is sorted
+        not_greater = position[:, width:] - np.arange(width)
+        inversions += int(width * width * len(blocks) - not_greater.sum())
+        blocks = np.take_along_axis(blocks, order, axis=1).ravel()
+        width *= 2
+    return inversions
+
+
+def discordant_pairs(coarse, exact):
+    """Fraction of member pairs the two fitness arrays order differently,
+    0 for the same ranking and 1 for the reversed one (ties agree);
+    the inversions of exact sorted by coarse, then by exact so that
+    ties of coarse are not counted
+    """
+    coarse = np.asarray(coarse, dtype=float)
+    exact = np.asarray(exact, dtype=float)
+    n = len(coarse)
+    if n < 2:
+        return 0.0
+    order = np.lexsort((exact, coarse))
+    return count_inversions(exact[order]) / (n * (n - 1) / 2)
+
+
+def screening_report(coarse, flown, fitness, flystate, ratio,
+                     audit=False):
+    """How much the coarse ranking disagrees with the exact one
+    - flown: members flown exactly, fitness and flystate their exact
+      outcome; an audit flies every member exactly, then flown holds
+      every member and the candidates of ratio are chosen again
+    - discordant_pairs: between the coarse and exact fitness
+    - top_missed: ratio of the exact best members the screening would
+      have cut, landings_missed: landings it would have cut, both
+      None without audit
+    """
+    fitness = np.asarray(fitness, dtype=float)
+    report = {'members': len(coarse), 'flown': len(flown), 'audited': audit,
+              'discordant_pairs': discordant_pairs(coarse.fitness[flown],
+                                                   fitness),
+              'top_missed': None, 'landings_missed': None}
+    if audit:
+        selected = candidates(coarse, ratio)
+        report['flown'] = len(selected)
+        exact_best = best_members(fitness, len(selected))
+        landed = np.flatnonzero(np.asarray(flystate) == LANDED)
+        report['top_missed'] = (len(np.setdiff1d(exact_best, selected))
+                                / len(exact_best))
+        report['landings_missed'] = len(np.setdiff1d(landed, selected))
+    return report
+
+
+def merge(coarse, exact, flown):
+    """BatchResult of every member, the exact outcome of the flown ones"""
+    sources = [(coarse, i) for i in range(len(coarse))]
+    for j, i in enumerate(flown):
+        sources[i] = (exact, j)
+    return BatchResult.gather(sources)
+
+
+def summarize(reports):
+    """Average of the screening reports of a run: ratio of members
+    flown exactly, discordant pairs, and for the audited generations
+    the best members missed and the landings missed
+    """
+    if not reports:
+        return {}
+    audits = [report for report in reports if report['audited']]
+    screened = [report for report in reports if not report['audited']]
+    summary = {'generations': len(reports), 'audits': len(audits)}
+    if screened:
+        summary['flown_ratio'] = float(np.mean(
+            [report['flown'] / report['members'] for report in screened]))
+        summary['discordant_pairs'] = float(np.mean(
+            [report['discordant_pairs'] for report in screened]))
+    if audits:
+        summary['audit_discordant_pairs'] = float(np.mean(
+            [report['discordant_pairs'] for report in audits]))
+        summary['top_missed'] = float(np.mean(
+            [report['top_missed'] for report in audits]))
+        summary['landings_missed'] = sum(report['landings_missed']
+                                         for report in audits)
+    return summary
@@ -0,0 +1,115 @@
+"""Deterministic fixed-point physics
+
+Speeds and accelerations are integers in units of 1 / ONE (2^-16) and
+positions are integers in metres, so a flight only uses integer
+arithmetic and is bit-reproducible on every machine and process.
+The (angle, power) -> acceleration table is derived with Decimal
+arithmetic instead of the platform math library.
+
+Tolerance against the float path (Lander with physics="float"):
+- every acceleration is rounded to the nearest 2^-16 m/s²,
+  so after n ticks of 1 second a speed differs by at most n * 2^-17 m/s
+  and a position by at most n² * 2^-18 m before rounding
+  (0.0008 m/s and 0.04 m after 100 ticks)
+- positions and speeds are rounded to integers each tick, so the
+  integer values shown in State are identical except when the exact
+  value lies within that error of a .5 boundary, where they differ by 1
+  and the two flights may drift apart afterwards
+"""
+from decimal import Decimal, localcontext, ROUND_HALF_EVEN
+from functools import lru_cache
+import numpy as np
+
+SCALE_BITS = 16
+ONE = 1 << SCALE_BITS
+
+MIN_ANGLE, MAX_ANGLE = -90, 90
+MIN_POWER, MAX_POWER = 0, 4
+
+GRAVITY = Decimal('-3.711')
+PI = Decimal('3.14159265358979323846264338327950288419716939937510')
+
+
+def decimal_cos_sin(angle):
+    """Cosine and sine of an angle in degrees with Decimal Taylor series"""
+    with localcontext() as ctx:
+        ctx.prec = 40
+        theta = Decimal(angle) * PI / 180
+        cos, sin = Decimal(0), Decimal(0)
+        term = Decimal(1)  # theta^n / n!
+        for n in range(40):
+            if n % 4 == 0:
+                cos += term
+            elif n % 4 == 1:
+                sin += term
+            elif n % 4 == 2:
+                cos -= term
+            else:
+                sin -= term
+            term = term * theta / (n + 1)
+        return cos, sin
+
+
+def to_fixed(value):
+    """Decimal or float to the nearest fixed-point integer"""
+    value = Decimal(value) * ONE
+    return int(value.quantize(Decimal(1), rounding=ROUND_HALF_EVEN))
+
+
+@lru_cache(maxsize=None)
+def thrust_table():
+    """Fixed-point acceleration (gravity + thrust) per (angle, power)
+    - shape: (181, 5, 2), indexed by [angle + 90, power, (dx, dy)]
+    """
+    table = np.zeros((MAX_ANGLE - MIN_ANGLE + 1, MAX_POWER + 1, 2),
+                     dtype=np.int64)
+    for angle in range(MIN_ANGLE, MAX_ANGLE + 1):
+        cos, sin = decimal_cos_sin(angle)
+        for power in range(MIN_POWER, MAX_POWER + 1):
+            # Vector(0, power) rotated by angle, plus gravity
+            table[angle - MIN_ANGLE, power] = (to_fixed(-power * sin),
+                                               to_fixed(power * cos + GRAVITY))
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=None)
+def thrust_rows():
+    """thrust_table as nested lists of Python integers"""
+    return thrust_table().tolist()
+
+
+def round_div(numerator, denominator):
+    """Integer division rounded half to even, like round(n / d)"""
+    quotient, remainder = divmod(numerator, denominator)
+    if 2 * remainder > denominator or (2 * remainder == denominator
+                                       and quotient % 2 == 1):
+        quotient += 1
+    return quotient
+
+
+def round_div_array(numerator, denominator):
+    """round_div for integer NumPy arrays"""
+    quotient, remainder = np.divmod(numerator, denominator)
+    up = (2 * remainder > denominator) | ((2 * remainder == denominator)
+                                          & (quotient % 2 == 1))
+    return quotient + up
+
+
+def accelerate(x, y, vx, vy, ax, ay, seconds):
+    """One step of Particle.accelerate in fixed point
+    x, y: integer position in metres
+    vx, vy, ax, ay: fixed-point speed and acceleration
+    seconds: integer time step
+    returns the new (x, y, vx, vy), the position rounded to metres
+    Works on Python integers and on integer NumPy arrays
+    """
+    if isinstance(x, np.ndarray):
+        divide = round_div_array
+    else:
+        divide = round_div
+    # x + v * t + a * t² / 2, computed in units of 1 / (2 * ONE)
+    t2 = seconds * seconds
+    new_x = divide(2 * ONE * x + 2 * vx * seconds + ax * t2, 2 * ONE)
+    new_y = divide(2 * ONE * y + 2 * vy * seconds + ay * t2, 2 * ONE)
+    return new_x, new_y, vx + ax * seconds, vy + ay * seconds
@@ -0,0 +1,209 @@
+from population import Population
+from archive import TrajectoryArchive
+from rng import RandomStream, as_stream
+from multiprocessing import Process, Queue, Event
+from queue import Empty
+import numpy as np
+import time
+
+TOPOLOGIES = ("ring", "all", "random")
+
+
+def neighbours(island, islands, topology, rng=None):
+    """Islands that receive the migrants of island"""
+    others = [i for i in range(islands) if i != island]
+    if not others:
+        return []
+    if topology == "ring":
+        return [(island + 1) % islands]
+    if topology == "random":
+        return [others[int(as_stream(rng).integers(0, len(others)))]]
+    return others
+
+
+def _run_island(index, settings, scenario, stream, inboxes, results, stop,
+                start):
+    """Process side: evolve one island, a report always goes to
+    results, with the error if the island failed
+    """
+    # migrants still in flight when the run stops can be dropped
+    for inbox in inboxes:
+        inbox.cancel_join_thread()
+    report = {'island': index, 'error': None}
+    try:
+        report.update(_evolve_island(index, settings, scenario, stream,
+                                     inboxes, stop, start))
+    except Exception as error:
+        report['error'] = f'{type(error).__name__}: {error}'
+        # the other islands stop too
+        stop.set()
+    finally:
+        results.put(report)
+
+
+def _evolve_island(index, settings, scenario, stream, inboxes, stop, start):
+    """Evolve one island until it lands, another island lands or
+    max_generations is reached, return its report
+    """
+    init_position, fuel, ground_points = scenario
+    population = Population(settings['gene_size'],
+                            settings['mutation_rate'], settings['pop_size'],
+                            rng=stream)
+    population.elitism_ratio = settings['elitism_ratio']
+    population.selection_strategy = settings['selection_strategy']
+    population.engine = settings['engine']
+    population.physics = settings['physics']
+    population.archive = TrajectoryArchive("none")
+    interval = settings['interval']
+    max_generations = settings['max_generations']
+
+    population.simulate(init_position, fuel, ground_points)
+    population.calculate_fitness()
+    population.landing_zone_reached()
+    received = 0
+    while not population.evolved and not stop.is_set():
+        if (max_generations is not None
+                and population.generations >= max_generations):
+            break
+        generation = population.generations
+        if interval and generation > 0 and generation % interval == 0:
+            genes, fitness = population.emigrants(settings['migrants'])
+            for other in neighbours(index, len(inboxes),
+                                    settings['topology'], stream):
+                inboxes[other].put((genes, fitness))
+            while True:
+                try:
+                    genes, fitness = inboxes[index].get_nowait()
+                except Empty:
+                    break
+                population.immigrate(genes, fitness)
+                received += len(genes)
+
+        population.selection()
+        population.next_generation()
+        population.simulate(init_position, fuel, ground_points)
+        population.calculate_fitness()
+        population.landing_zone_reached()
+
+    if population.evolved:
+        stop.set()
+    best = population.best_member()
+    population.close()
+    return {'evolved': population.evolved,
+            'generations': population.generations,
+            'elapsed': time.time() - start,
+            'fitness': float(population.pool.fitness[best]),
+            'genes': population.pool.genes[best].copy(),
+            'migrants_received': received}
+
+
+class IslandRunner():
+    """Evolve several populations in their own process, exchanging
+    their best members from time to time
+    - islands: number of populations
+    - overrides: one dict per island of settings that differ from the
+      common ones, e.g. [{'mutation_rate': 0.05}, {'elitism_ratio': 0.2}]
+    - migrants: number of best members sent at each migration,
+      they replace the worst members of the receiving islands
+    - interval: generations between migrations, 0 to never migrate
+    - topology: "ring" (to the next island), "all" (to every other
+      island) or "random" (to one other island drawn each time)
+    - seed: root of the RNG streams, every island gets its own stream;
+      runs only repeat exactly without migrations (interval 0), the
+      migrants arrive whenever the other islands send them
+    - max_generations: stop an island after that many generations,
+      None to evolve until a member lands
+    All islands stop as soon as one of them lands, migrations do not
+    wait for the other islands
+    """
+    def __init__(self, islands, gene_size, mutation_rate, pop_size,
+                 overrides=None, migrants=2, interval=5, topology="ring",
+                 seed=None, max_generations=None):
+        if topology not in TOPOLOGIES:
+            raise ValueError(f'Unknown migration topology: {topology}')
+        self.islands = islands
+        self.settings = {'gene_size': gene_size,
+                         'mutation_rate': mutation_rate,
+                         'pop_size': pop_size,
+                         'elitism_ratio': 0.1,
+                         'selection_strategy': "roulette",
+                         'engine': "batch",
+                         'physics': "float",
+                         'migrants': migrants,
+                         'interval': interval,
+                         'topology': topology,
+                         'max_generations': max_generations}
+        self.overrides = overrides or [{} for _ in range(islands)]
+        if len(self.overrides) != islands:
+            raise ValueError('One override dict is needed per island')
+        self.seed = seed
+        self.reports = []  # one dict per island, see _run_island
+        self.elapsed = 0
+
+    def island_settings(self, island):
+        settings = dict(self.settings)
+        settings.update(self.overrides[island])
+        return settings
+
+    def streams(self):
+        """Independent RandomStream of every island from the root seed"""
+        return RandomStream(np.random.SeedSequence(self.seed)).spawn(
+            self.islands)
+
+    def run(self, init_position, fuel, ground_points):
+        """Evolve all islands, return the report of the first island
+        that landed, or of the fittest one if none did
+        """
+        start = time.time()
+        scenario = (tuple(init_position), fuel, list(ground_points))
+        inboxes = [Queue() for _ in range(self.islands)]
+        results = Queue()
+        stop = Event()
+        processes = [Process(target=_run_island,
+                             args=(i, self.island_settings(i), scenario,
+                                   stream, inboxes, results, stop, start))
+                     for i, stream in enumerate(self.streams())]
+        for process in processes:
+            process.start()
+        try:
+            reports = self.collect(processes, results)
+        finally:
+            stop.set()
+            # a report left in the queue keeps its process alive
+            while any(process.is_alive() for process in processes):
+                try:
+                    results.get(timeout=0.1)
+                except Empty:
+                    pass
+            for process in processes:
+                process.join()
+        self.reports = sorted(reports, key=lambda report: report['island'])
+        self.elapsed = time.time() - start
+        return self.winner()
+
+    def collect(self, processes, results, poll=1.0):
+        """Report of every island, raise RuntimeError when an island
+        failed or its process died without a report
+        """
+        reports = {}
+        while len(reports) < len(processes):
+            try:
+                report = results.get(timeout=poll)
+            except Empty:
+                for island, process in enumerate(processes):
+                    if island not in reports and process.exitcode is not None:
+                        raise RuntimeError(
+                            f'Island {island} exited with code '
+                            f'{process.exitcode} without a report')
+                continue
+            if report['error'] is not None:
+                raise RuntimeError(
+                    f"Island {report['island']} failed: {report['error']}")
+            reports[report['island']] = report
+        return list(reports.values())
+
+    def winner(self):
+        landed = [report for report in self.reports if report['evolved']]
+        if landed:
+            return min(landed, key=lambda report: report['elapsed'])
+        return max(self.reports, key=lambda report: report['fitness'])
@@ -1,10 +1,13 @@
-from plane import Vector
-from motion import Time, Acceleration
+from plane import Point, Vector
+from motion import Time, Speed, Acceleration, Particle
+from terrain import Terrain, MAX_X, MIN_X
+import fixedpoint
+from functools import lru_cache
 import enum
 
 GRAVITY = Acceleration(Vector(0.0, -3.711))
-MAX_X = 6999
-MIN_X = 0
+# "float": math library rotation (reference), "fixed": see fixedpoint.py
+PHYSICS = ("float", "fixed")
 
 
 class ControlCommands():
@@ -12,6 +15,8 @@ class ControlCommands():
     - power : 0, 1, 2, 3, 4
     - angle : -90, -75, ... , 0, +15, +30, ..., +75, +90
     """
+    __slots__ = ('angle', 'power')
+
     def __init__(self, angle, power):
         self.angle = angle
         self.power = power
@@ -24,6 +29,8 @@ class State():
     - angle : -90, -75, ... , 0, +15, +30, ..., +75, +90
     - particle: instance of Particle class
     """
+    __slots__ = ('fuel', 'power', 'angle', 'particle', 'position', 'speed')
+
     def __init__(self, fuel, power, angle, particle):
         self.fuel = fuel
         self.power = power
@@ -52,22 +59,167 @@ class LandingZone():
                 break
 
 
+@lru_cache(maxsize=None)
+def acceleration_rows():
+    """Total acceleration (dx, dy) for every angle and power
+    computed with the Vector operations of Lander.compute_next_state
+    - indexed by [angle + 90][power]
+    """
+    rows = []
+    for angle in range(-90, 91):
+        row = []
+        for power in range(0, 5):
+            thrust = (Vector(0.0, 1.0) * power).rotate(angle)
+            acceleration = GRAVITY + Acceleration(thrust)
+            row.append((acceleration.vector.dx, acceleration.vector.dy))
+        rows.append(tuple(row))
+    return tuple(rows)
+
+
 class Lander():
-    """All physics of Mars lander (speed, acceleration, trajectory, ...)"""
-    def __init__(self, init_state, commands, ground):
-        self.trajectory = [init_state]
+    """All physics of Mars lander (speed, acceleration, trajectory, ...)
+    - ground: Terrain shared by every lander (a Line is compiled into one)
+    - physics: "float" or "fixed" (deterministic fixed-point integrator)
+    - record: keep the whole trajectory and the commands, or only the
+      last two states that calculate_fitness needs
+    - commands: any iterable, only the commands flown are read and
+      kept in commands (a list, None without record); ticks is their
+      number
+    The float physics runs on local floats (see integrate) and the
+    State objects of the trajectory are only built when it is read
+    """
+    def __init__(self, init_state, commands, ground, physics="float",
+                 record=True):
+        if physics not in PHYSICS:
+            raise ValueError(f'Unknown physics: {physics}')
+        self.physics = physics
+        self.record = record
+        self.init_state = init_state
+        self.rows = []  # (x, y, vx, vy, h_speed, v_speed, angle, power, fuel)
+        self._trajectory = None
         self.flystate = FlyState.Flying
         self.commands = commands
+        self.ticks = 0  # commands flown before landing or crashing
+        if not isinstance(ground, Terrain):
+            ground = Terrain(ground.points)
         self.ground = ground
         self.landing_zone = []
         self.fitness = 0.0
-        self.compute_trajectory()
+        if physics == "float":
+            self.integrate()
+        else:
+            self.trajectory = [init_state]
+            self.compute_trajectory()
         self.calculate_fitness()
+        if not record:
+            self.commands = None
+
+    @property
+    def trajectory(self):
+        """States of the flight, built from the integrated rows once"""
+        if not self.record:
+            raise ValueError('Trajectory was not recorded!')
+        if self._trajectory is None:
+            self._trajectory = [self.init_state]
+            self._trajectory.extend(self.row_to_state(row)
+                                    for row in self.rows)
+        return self._trajectory
+
+    @trajectory.setter
+    def trajectory(self, states):
+        self._trajectory = states
+        self.rows = []
+
+    @staticmethod
+    def row_to_state(row):
+        x, y, vx, vy, h_speed, v_speed, angle, power, fuel = row
+        speed = Speed(Vector(vx, vy))
+        speed.h_speed = h_speed
+        speed.v_speed = v_speed
+        return State(fuel, power, angle, Particle(Point(x, y), speed))
+
+    def get_state(self, i):
+        """i-th state of the trajectory without building the others"""
+        if self._trajectory is not None:
+            return self._trajectory[i]
+        if i < 0:
+            i += len(self.rows) + 1
+        if i == 0:
+            return self.init_state
+        return self.row_to_state(self.rows[i - 1])
+
+    def integrate(self, time=Time(1)):
+        """compute_trajectory with the float physics on local variables,
+        every tick gives the same values as compute_next_state
+        """
+        table = acceleration_rows()
+        ground = self.ground
+        heights, min_x, max_x = ground.height_list, ground.min_x, ground.max_x
+        seconds = time.seconds
+        square = seconds ** 2
+        state = self.init_state
+        x, y = state.position.x, state.position.y
+        vx, vy = state.speed.direction.dx, state.speed.direction.dy
+        angle, power, fuel = state.angle, state.power, state.fuel
+        rows = self.rows = []
+        self._trajectory = None
+        append = rows.append
+        record = self.record
+        flown = []
+        keep = flown.append
+        previous = row = None
+        ticks = 0
+        for ticks, cmd in enumerate(self.commands, 1):
+            turn = cmd.angle - angle
+            angle += -15 if turn < -15 else 15 if turn > 15 else turn
+            step = cmd.power - power
+            power += -1 if step < -1 else 1 if step > 1 else step
+            ax, ay = table[angle + 90][power]
+            x = round(x + vx * seconds + ax * square * 0.5)
+            y = round(y + vy * seconds + ay * square * 0.5)
+            vx = vx + ax * seconds
+            vy = vy + ay * seconds
+            fuel -= power
+            previous, row = row, (x, y, vx, vy, round(vx), round(vy),
+                                  angle, power, fuel)
+            if record:
+                append(row)
+                keep(cmd)
+
+            if x > max_x or x < min_x:
+                self.flystate = FlyState.Crashed
+                break
+            ground_y = heights[x - min_x]
+            if ground_y != ground_y:
+                raise ValueError(f'No ground segment for x={x}!')
+            if ground_y > y:
+                if (angle == 0 and abs(round(vy)) <= 40
+                        and abs(round(vx)) <= 20
+                        and ground.is_horizontal_at_x(x)):
+                    self.flystate = FlyState.Landed
+                else:
+                    self.flystate = FlyState.Crashed
+                break
+            if fuel <= 0:
+                self.flystate = FlyState.Crashed
+                break
+        self.ticks = ticks
+        self.commands = flown
+        if not record:
+            self.rows = [r for r in (previous, row) if r is not None]
 
     def compute_trajectory(self):
-        for i, cmd in enumerate(self.commands):
-            next_state = self.compute_next_state(self.trajectory[i], cmd)
-            self.trajectory.append(next_state)
+        states = self._trajectory
+        commands, self.commands = self.commands, []
+        self.ticks = 0
+        for cmd in commands:
+            next_state = self.compute_next_state(states[-1], cmd)
+            states.append(next_state)
+            self.ticks += 1
+            if self.record:
+                self.commands.append(cmd)
+            elif len(states) > 2:
+                del states[0]
 
             if self.evaluate_outside(next_state):
                 return 1
@@ -77,7 +229,7 @@ class Lander():
                 return 1
 
     def evaluate_outside(self, next_state):
-        if next_state.position.x > MAX_X or next_state.position.x < MIN_X:
+        if self.ground.is_outside(next_state.position.x):
             self.flystate = FlyState.Crashed
             return True
         return False
@@ -113,34 +265,49 @@ class Lander():
         new_power = (curr_state.power +
                      self.coerce_range(cmd.power - curr_state.power, -1, 1))
 
-        thrust = (Vector(0.0, 1.0) * new_power).rotate(new_angle)
-        thrust_acceleration = Acceleration(thrust)
-        acceleration = GRAVITY + thrust_acceleration
-        new_particle = curr_state.particle.accelerate(acceleration, time)
+        if self.physics == "fixed":
+            new_particle = self.accelerate_fixed(curr_state.particle,
+                                                 new_angle, new_power, time)
+        else:
+            thrust = (Vector(0.0, 1.0) * new_power).rotate(new_angle)
+            thrust_acceleration = Acceleration(thrust)
+            acceleration = GRAVITY + thrust_acceleration
+            new_particle = curr_state.particle.accelerate(acceleration, time)
         new_fuel = curr_state.fuel - new_power
 
         return State(new_fuel, new_power, new_angle, new_particle)
 
+    def accelerate_fixed(self, particle, angle, power, time):
+        """Particle.accelerate with the fixed-point thrust table"""
+        ax, ay = fixedpoint.thrust_rows()[angle - fixedpoint.MIN_ANGLE][power]
+        x, y, vx, vy = fixedpoint.accelerate(
+            round(particle.position.x), round(particle.position.y),
+            round(particle.speed.direction.dx * fixedpoint.ONE),
+            round(particle.speed.direction.dy * fixedpoint.ONE),
+            ax, ay, time.seconds)
+        # fixed-point speeds are dyadic, so they convert to float exactly
+        speed = Speed(Vector(vx / fixedpoint.ONE, vy / fixedpoint.ONE))
+        speed.h_speed = fixedpoint.round_div(vx, fixedpoint.ONE)
+        speed.v_speed = fixedpoint.round_div(vy, fixedpoint.ONE)
+        return Particle(Point(x, y), speed)
+
     def hit_landing_area(self):
-        land = LandingZone(self.ground.points)
-        land.find_landing_zone()
-        self.landing_zone = land.landing_points
-        lander_last_position = self.trajectory[-2].position
-        lander_hit_area = self.ground.get_segment_for(lander_last_position.x)
-        if (self.landing_zone[0].x == lander_hit_area[0].x
-            and self.landing_zone[0].y == lander_hit_area[0].y
-            and self.landing_zone[1].x == lander_hit_area[1].x
-                and self.landing_zone[1].y == lander_hit_area[1].y):
-            return True
-        return False
+        self.landing_zone = self.ground.landing_zone
+        if self.landing_zone is None:
+            raise ValueError('Ground should have a flat landing zone!')
+        lander_last_position = self.get_state(-2).position
+        return (self.ground.segment_index(lander_last_position.x)
+                == self.ground.landing_index)
 
     def calculate_fitness(self):
         if not self.hit_landing_area():
-            last_position = self.trajectory[-2].position
-            distance = self.landing_zone[0].distance_to(last_position)
+            last_position = self.get_state(-2).position
+            # positions are integers, so only an exact hit of the
+            # landing zone corner gives a distance below 1
+            distance = max(self.landing_zone[0].distance_to(last_position), 1)
             self.fitness = 1 / distance
         else:
-            last_speed = self.trajectory[-2].speed
+            last_speed = self.get_state(-2).speed
             x_pen = 0
             if abs(last_speed.h_speed) > 20:
                 x_pen = (abs(last_speed.h_speed) - 20)
@@ -149,4 +316,8 @@ class Lander():
             if last_speed.v_speed < -40:
                 y_pen = (-40 - last_speed.v_speed)
 
-            self.fitness = 1 - (1 / (x_pen + y_pen))
+            # no penalty at all: speeds already safe over the landing zone
+            if x_pen + y_pen == 0:
+                self.fitness = 1.0
+            else:
+                self.fitness = 1 - (1 / (x_pen + y_pen))
@@ -0,0 +1,149 @@
+"""Per-phase profiling of the evolve loop
+
+    profiler = Profiler("metrics.jsonl")
+    profiler.attach(population)
+    ... evolve ...
+    profiler.detach(population)
+
+attach() wraps selection, next_generation, simulate and
+calculate_fitness of one Population, nothing is wrapped (and nothing
+is measured) on a population without profiler. A generation ends with
+calculate_fitness, which emits one JSON-lines record
+"""
+from lander import FlyState
+import numpy as np
+import json
+import time
+import tracemalloc
+
+PHASES = ("selection", "next_generation", "simulate", "calculate_fitness")
+
+
+class Profiler():
+    """Time the phases of every generation and emit one record each
+    - path: JSON-lines file the records are appended to, None for none
+    - track_allocations: also record peak_bytes, the peak in bytes of
+      the memory traced during each phase above the memory traced when
+      it started (tracemalloc, whose peak is reset at every phase;
+      slows every allocation down)
+    - callbacks: functions called as callback(phase, seconds,
+      peak_bytes) after each phase, peak_bytes is None when not tracked
+    - records: every emitted record
+    """
+    def __init__(self, path=None, track_allocations=False, callbacks=()):
+        self.path = path
+        self.track_allocations = track_allocations
+        self.callbacks = list(callbacks)
+        self.records = []
+        self.timings = {}
+        self.peak_bytes = {}
+        self.started = None
+        self.stream = open(path, 'a') if path is not None else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def attach(self, population):
+        """Wrap the phases of population with the profiler"""
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        for phase in PHASES:
+            method = getattr(population, phase)
+            setattr(population, phase, self.wrap(population, phase, method))
+
+    def detach(self, population):
+        for phase in PHASES:
+            if phase in vars(population):
+                delattr(population, phase)
+
+    def wrap(self, population, phase, method):
+        def profiled(*args, **kwargs):
+            if self.started is None:
+                self.started = time.perf_counter()
+            if self.track_allocations:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            value = method(*args, **kwargs)
+            seconds = time.perf_counter() - start
+            peak_bytes = None
+            if self.track_allocations:
+                peak_bytes = tracemalloc.get_traced_memory()[1] - before
+                self.peak_bytes[phase] = peak_bytes
+            self.timings[phase] = self.timings.get(phase, 0) + seconds
+            for callback in self.callbacks:
+                callback(phase, seconds, peak_bytes)
+            if phase == "calculate_fitness":
+                self.emit(population)
+            return value
+        return profiled
+
+    def emit(self, population):
+        record = self.record(population)
+        self.records.append(record)
+        if self.stream is not None:
+            self.stream.write(json.dumps(record) + '\n')
+            self.stream.flush()
+        self.timings, self.peak_bytes = {}, {}
+        self.started = None
+        return record
+
+    def record(self, population):
+        """Metrics of the generation that just ended"""
+        fitness = np.asarray(population.pool.fitness, dtype=float)
+        simulate = self.timings.get("simulate")
+        record = {
+            'generation': population.generations,
+            'time': time.time(),
+            'seconds': time.perf_counter() - self.started,
+            'phases': dict(self.timings),
+            'members': len(fitness),
+            'members_per_sec': (len(fitness) / simulate if simulate
+                                else None),
+            'fitness': {
+                'min': float(fitness.min()),
+                'max': float(fitness.max()),
+                'mean': float(fitness.mean()),
+                'std': float(fitness.std()),
+                'p10': float(np.percentile(fitness, 10)),
+                'median': float(np.median(fitness)),
+                'p90': float(np.percentile(fitness, 90))},
+        }
+        record.update(flystate_counts(population))
+        if self.track_allocations:
+            record['peak_bytes'] = dict(self.peak_bytes)
+        cache = population.cache
+        if cache is not None:
+            lookups = cache.last_hits + cache.last_misses
+            record['cache'] = {
+                'hits': cache.last_hits,
+                'misses': cache.last_misses,
+                'hit_rate': cache.last_hits / lookups if lookups else 0.0,
+                'total_hit_rate': cache.hit_rate(),
+                'size': len(cache)}
+        if population.incremental_stats:
+            record['incremental'] = dict(population.incremental_stats)
+        return record
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+
+def flystate_counts(population):
+    """Number of landed, crashed and still flying members"""
+    result = population.last_result
+    if population.engine != "object" and result is not None:
+        states = np.bincount(result.flystate, minlength=4)
+        counts = {state: int(states[state.value]) for state in FlyState}
+    else:
+        counts = {state: 0 for state in FlyState}
+        for simulation in population.simulations:
+            counts[simulation.flystate] += 1
+    return {'landed': counts[FlyState.Landed],
+            'crashed': counts[FlyState.Crashed],
+            'flying': counts[FlyState.Flying]}
@@ -1,4 +1,6 @@
 class Time():
+    __slots__ = ('seconds',)
+
     def __init__(self, seconds):
         self.seconds = seconds
 
@@ -11,6 +13,8 @@ class Speed():
     speed1 + speed2 = new speed
     direction: instance of Vector class
     """
+    __slots__ = ('direction', 'h_speed', 'v_speed')
+
     def __init__(self, direction):
         self.direction = direction
         self.h_speed = direction.dx
@@ -28,6 +32,8 @@ class Acceleration():
     acc1 + acc2 = new acc
     Acceleration * Time -> Speed
     """
+    __slots__ = ('vector',)
+
     def __init__(self, vector):
         self.vector = vector
 
@@ -47,6 +53,8 @@ class Particle():
     position: instance of Point class
     speed: instance of Speed class
     """
+    __slots__ = ('position', 'speed')
+
     def __init__(self, position, speed):
         self.position = position
         self.speed = speed
@@ -0,0 +1,130 @@
+from engine import BatchEngine, BatchResult, genes_to_commands
+from terrain import Terrain
+from lander import State
+from plane import Point, Vector
+from motion import Speed, Particle
+from multiprocessing import Pool, shared_memory
+import numpy as np
+import os
+
+# Per worker process: compiled engines by scenario and attached genes
+_engines = {}
+_buffers = {}
+
+
+def _get_engine(ground_points, physics):
+    key = (tuple(ground_points), physics)
+    if key not in _engines:
+        _engines[key] = BatchEngine(Terrain.from_inputs(ground_points),
+                                    physics)
+    return _engines[key]
+
+
+def _get_genes(name, shape):
+    if name not in _buffers:
+        # a new buffer replaces the previous one of the evaluator
+        for old in _buffers.values():
+            old.close()
+        _buffers.clear()
+        _buffers[name] = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=np.int8, buffer=_buffers[name].buf)
+
+
+def _evaluate_chunk(task):
+    """Worker side: fly members [start, stop) of the shared genes"""
+    (name, shape, start, stop, ground_points, init_position, fuel, speed,
+     angle, power, physics, final_state) = task
+    genes = _get_genes(name, shape)[start:stop]
+    x, y = init_position
+    init_state = State(fuel, power, angle,
+                       Particle(Point(x, y), Speed(Vector(*speed))))
+    angles, powers = genes_to_commands(genes, (angle, power))
+    result = _get_engine(ground_points, physics).simulate(
+        init_state, angles, powers, record=False)
+    final = result.final if final_state else None
+    return start, result.fitness, result.flystate, result.lengths, final
+
+
+class ParallelEvaluator():
+    """Fly a population on a pool of worker processes
+    - workers: number of processes, os.cpu_count() by default
+    - chunk_size: number of members per task
+    - final_state: also return the last state of every member
+    Genes are shared with the workers through a shared memory block
+    instead of pickling chromosomes, every worker keeps the compiled
+    terrain between generations and only fitness, fly state, trajectory
+    length and optionally the final state come back
+    """
+    def __init__(self, workers=None, chunk_size=256, physics="float",
+                 final_state=False):
+        self.workers = workers or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.physics = physics
+        self.final_state = final_state
+        self.pool = None
+        self.buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def share(self, genes):
+        """Copy the genes into the shared memory block"""
+        if self.buffer is None or self.buffer.size < genes.nbytes:
+            self.release()
+            self.buffer = shared_memory.SharedMemory(
+                create=True, size=max(genes.nbytes, 1))
+        shared = np.ndarray(genes.shape, dtype=np.int8,
+                            buffer=self.buffer.buf)
+        shared[...] = genes
+        return self.buffer.name
+
+    def evaluate(self, genes, init_position, fuel, ground_points,
+                 speed=(0, 0), angle=0, power=0):
+        """Fly every member of genes (pop_size x gene_size x 2)
+        from a start state, at rest by default
+        returns a BatchResult without trajectories
+        """
+        genes = np.asarray(genes, dtype=np.int8)
+        name = self.share(genes)
+        if self.pool is None:
+            # started after the first shared block, so that the workers
+            # inherit the resource tracker instead of starting their own
+            self.pool = Pool(self.workers)
+        pop_size = len(genes)
+        tasks = [(name, genes.shape, start,
+                  min(start + self.chunk_size, pop_size),
+                  list(ground_points), tuple(init_position), fuel,
+                  tuple(speed), angle, power, self.physics, self.final_state)
+                 for start in range(0, pop_size, self.chunk_size)]
+
+        fitness = np.zeros(pop_size)
+        flystate = np.zeros(pop_size, dtype=np.int8)
+        lengths = np.zeros(pop_size, dtype=np.int64)
+        final = {} if self.final_state else None
+        for start, *chunk in self.pool.imap_unordered(_evaluate_chunk, tasks):
+            stop = start + len(chunk[0])
+            fitness[start:stop] = chunk[0]
+            flystate[start:stop] = chunk[1]
+            lengths[start:stop] = chunk[2]
+            if self.final_state:
+                for key, value in chunk[3].items():
+                    final.setdefault(key, np.zeros(pop_size, value.dtype))
+                    final[key][start:stop] = value
+        return BatchResult(fitness, flystate, lengths, final, None)
+
+    def release(self):
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer.unlink()
+            self.buffer = None
+
+    def close(self):
+        """Stop the workers and free the shared memory"""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        self.release()
@@ -7,6 +7,8 @@ class Point():
     Point - Point  -> Vector
     Point to Point distance -> Vector
     """
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -31,6 +33,8 @@ class Vector():
     Vector rotation: Angle in radians -> Vector
     Vector magnitude: Vector -> Scalar
     """
+    __slots__ = ('dx', 'dy')
+
     def __init__(self, dx, dy):
         self.dx = dx
         self.dy = dy
@@ -1,10 +1,17 @@
-from plane import Point, Vector, Line
+from plane import Point, Vector
 from lander import ControlCommands, State, FlyState, Lander
 from motion import Speed, Particle
-from chromosome import Chromosome
-import matplotlib.pyplot as plt
+from chromosome import GenePool
+from engine import (BatchEngine, BatchResult, SimulatedLander,
+                    genes_to_commands)
+from archive import TrajectoryArchive, record_members
+from cache import FitnessCache, Outcome, outcomes_result
+from selection import get_selection, roulette_probability, best_members
+from rng import as_stream
+from fidelity import (SCREENINGS, coarse_flight, candidates,
+                      screening_report, merge)
+from terrain import Terrain, ground_inputs_to_line
 from collections import namedtuple
-from copy import deepcopy
 import numpy as np
 import math
 
@@ -19,23 +26,23 @@ def coerce_range(value, min_value, max_value):
     return value
 
 
-def ground_inputs_to_line(ground_points):
-    points = []
-    for point in ground_points:
-        points.append(Point(*map(int, point.split())))
-    return Line(points)
-
-
 class Population():
     """A class to describe a population, where each member
     is an instance of a chromosome class
+    - pool: initial GenePool, random walks by default
+    - rng: RandomStream or seed of every random operator, None for the
+      global NumPy RNG, see rng.py
     """
-    def __init__(self, gene_size, mutation_rate, pop_size):
+    def __init__(self, gene_size, mutation_rate, pop_size, pool=None,
+                 rng=None):
         self.population_size = pop_size
-        self.population = []  # List to store the current population
+        self.pool = None  # Genes and fitness of the current population
         self.population_fitness = []  # List to store fit score for each member
-        self.parents = []  # List from which we choose parents to create childs
-        self.probability = []  # Probability of each parent to be choosen
+        self.parent_indices = []  # Parents of the next generation childs
+        self.probability = []  # Probability of each member to be choosen
+        # "roulette", "sus", "tournament", "rank" or a function,
+        # see selection.py
+        self.selection_strategy = "roulette"
         self.generations = 0
         self.evolved = False  # Are we finished evolving
         self.mutation_rate = mutation_rate
@@ -43,13 +50,75 @@ class Population():
         self.gene_size = gene_size
         self.simulations = []  # all simulations for current population
         self.ground_points = []
-        self.all_simulations = []
+        self.terrain = None  # Terrain compiled from the last ground points
+        self.terrain_inputs = None
+        # trajectories of every generation, see TrajectoryArchive
+        # for the retention policies and the on-disk spilling
+        self.archive = TrajectoryArchive()
         # ratio of best chromosomes in current population
         # that we copy into new population
         self.elitism_ratio = 0.1
+        # physics used by simulate: "object" (one Lander per member,
+        # the reference implementation), "batch" (BatchEngine)
+        # or "parallel" (BatchEngine on a pool of worker processes)
+        self.engine = "object"
+        self.workers = None  # worker processes, None for all cores
+        self.chunk_size = 256  # members per task sent to a worker
+        self.evaluator = None  # ParallelEvaluator, started on first use
+        # FitnessCache consulted by simulate, None to fly every member
+        self.cache = None
+        # ticks between trajectory checkpoints of the batch engine,
+        # children then resume from their parent instead of tick 0
+        self.checkpoint_every = None
+        self.last_result = None  # BatchResult of the previous generation
+        self.last_scenario = None
+        self.last_generation = None  # generation last_result was flown at
+        # members copied from / resumed from their parent, ticks skipped
+        self.incremental_stats = {}
+        # "float" or "fixed" (deterministic fixed-point physics)
+        self.physics = "float"
+        # members whose whole trajectory is recorded, see record_members:
+        # None for every member, else "top", "sample" (record_count
+        # members) or a list of member indices, the other members only
+        # keep the last two states their fitness needs
+        self.record_policy = None
+        self.record_count = 10
+        self.rng = as_stream(rng)
+        self.record_rng = None  # draws of the "sample" record policy
+        # multi-fidelity evaluation, see fidelity.py:
+        # None flies every member exactly, "step" or "horizon" screen them
+        # with a coarse flight and only fly exactly the screening_ratio
+        # best ones (the fitness cache and checkpoint_every are not used)
+        self.screening = None
+        self.screening_step = 4  # seconds per tick of "step"
+        self.screening_horizon = 30  # turns flown by "horizon"
+        self.screening_ratio = 0.25
+        # generations between two audits flying every member exactly,
+        # 0 to never audit
+        self.screening_audit = 10
+        self.screening_stats = []  # report of every screened generation
+        # members the last simulate only flew coarsely, None for none
+        self.screened_out = None
+        # genes past the end of a flight never change it: with a margin,
+        # crossover and mutation only work on the genes a member flew
+        # plus live_margin (see GenePool.live), None for every gene
+        self.live_margin = None
+
+        if pool is None:
+            pool = GenePool.random(self.population_size, gene_size,
+                                   self.rng)
+        self.pool = pool
 
-        for _ in range(self.population_size):
-            self.population.append(Chromosome(gene_size))
+    @property
+    def population(self):
+        """Members of the current population as Chromosome views"""
+        return self.pool.members()
+
+    @population.setter
+    def population(self, members):
+        self.pool = GenePool(np.array([member.pool.genes[member.index]
+                                       for member in members]),
+                             [member.fitness for member in members])
 
     def __str__(self):
         info = f"\nTotal generations: {self.generations}"
@@ -58,110 +127,458 @@ class Population():
         info += f"\nPopulation max fitness score: {self.get_max_fitness():.2f}"
         return info
 
-    def simulate(self, init_position, fuel, ground_points):
+    def simulate(self, init_position, fuel, ground_points, engine=None):
         """From each chromosome in population we create object
         of Lander class and compute trajectory
+        - engine: "object", "batch" or "parallel", defaults to self.engine
         """
         x, y = init_position[0], init_position[1]
         lander_init_state = State(fuel, 0, 0, Particle(Point(x, y),
                                   Speed(Vector(0, 0))))
-        ground_line = ground_inputs_to_line(ground_points)
-        self.ground_points = ground_line
+        self.simulate_state(lander_init_state, ground_points, engine)
+
+    def simulate_state(self, lander_init_state, ground_points, engine=None):
+        """simulate from any State, e.g. a lander already in flight"""
+        engine = engine or self.engine
+        if engine not in ("object", "batch", "parallel"):
+            raise ValueError(f'Unknown simulation engine: {engine}')
+        terrain = self.get_terrain(ground_points)
+        self.ground_points = terrain
         self.simulations = []
+        position = lander_init_state.position
+        direction = lander_init_state.speed.direction
+        start = (position.x, position.y, direction.dx, direction.dy,
+                 lander_init_state.angle, lander_init_state.power)
+        fuel = lander_init_state.fuel
+        record = self.record_policy is None
+        self.screened_out = None
+        kind = engine if record else engine + "/fitness"
+        scenario = FitnessCache.scenario_key(ground_points, start, fuel,
+                                             self.physics, kind)
+        if self.screening is not None:
+            self.simulations = self.simulate_screened(
+                lander_init_state, terrain, engine, record)
+            if not record:
+                self.record_trajectories(lander_init_state, terrain, engine)
+            self.last_result = None
+            return
+        if engine == "object":
+            self.simulations = self.simulate_landers(
+                lander_init_state, terrain, scenario, record)
+            if record:
+                # members found in the cache have no trajectory
+                members = [i for i, simulation in enumerate(self.simulations)
+                           if not isinstance(simulation, Outcome)]
+                self.archive.add_landers(
+                    self.generations,
+                    [self.simulations[i] for i in members], members)
+            else:
+                self.record_trajectories(lander_init_state, terrain, engine)
+            return
+
+        if engine == "parallel":
+            # no trajectories come back from the workers
+            def run(members):
+                return self.get_evaluator().evaluate(
+                    self.pool.genes[members], start[:2], fuel,
+                    ground_points, start[2:4], *start[4:])
+        else:
+            batch_engine = BatchEngine(terrain, self.physics)
+
+            def run(members):
+                return self.simulate_incremental(
+                    batch_engine, lander_init_state, members, scenario,
+                    record)
+        result, flown, members = self.simulate_cached(run, scenario)
+        self.simulations = result.landers()
+        if record and flown is not None:
+            self.archive.add_result(self.generations, flown, members)
+        else:
+            self.record_trajectories(lander_init_state, terrain, engine)
+        self.last_result, self.last_scenario = result, scenario
+        self.last_generation = self.generations
+
+    def record_trajectories(self, lander_init_state, terrain, engine):
+        """Fly again, with their whole trajectory, the members chosen
+        by record_policy and store them in the archive
+        """
+        fitness = [simulation.fitness for simulation in self.simulations]
+        if self.record_rng is None:
+            # recording must not change the evolution of a seeded run
+            self.record_rng = (self.rng.spawn(1)[0]
+                               if self.rng.generator is not None
+                               else self.rng)
+        members = record_members(self.record_policy, fitness,
+                                 self.record_count, self.record_rng)
+        if engine == "object":
+            previous = (lander_init_state.angle, lander_init_state.power)
+            landers = [Lander(lander_init_state,
+                              self.member_commands(self.pool[i], previous),
+                              terrain, self.physics) for i in members]
+            for i, lander in zip(members, landers):
+                self.simulations[i] = lander
+            self.archive.add_landers(self.generations, landers, members)
+            return
+        angles, powers = genes_to_commands(
+            self.pool.genes[members],
+            (lander_init_state.angle, lander_init_state.power))
+        result = BatchEngine(terrain, self.physics).simulate(
+            lander_init_state, angles, powers)
+        for j, i in enumerate(members):
+            self.simulations[i] = SimulatedLander(result, j)
+        self.archive.add_result(self.generations, result, members)
+
+    @staticmethod
+    def iter_commands(member, previous=(0, 0)):
+        """Commands flown by the Lander of a chromosome, built one at a
+        time while the Lander flies: none after it landed or crashed
+        - previous: (angle, power) of the state the Lander starts from
+        """
+        previous_gene = CMD_TUPLE(*previous)
+        for gene in member.genes:
+            angle = previous_gene.angle + coerce_range(
+                gene.angle - previous_gene.angle, -15, 15)
+            power = previous_gene.power + coerce_range(
+                gene.power - previous_gene.power, -15, 15)
+            yield ControlCommands(angle, power)
+            previous_gene = gene
+
+    @classmethod
+    def member_commands(cls, member, previous=(0, 0)):
+        """List of all the commands of a chromosome"""
+        return list(cls.iter_commands(member, previous))
+
+    def simulate_landers(self, lander_init_state, terrain, scenario,
+                         record=True):
+        """One Lander per member, members found in the cache are reused
+        - record: keep the trajectories, else only the last two states
+        """
+        simulations = []
+        hits = misses = 0
+        previous = (lander_init_state.angle, lander_init_state.power)
         for member in self.population:
-            commands = []
-            previous_gene = CMD_TUPLE(0, 0)
-            for gene in member.genes:
-                angle = previous_gene.angle + coerce_range(
-                    gene.angle - previous_gene.angle, -15, 15)
-                power = previous_gene.power + coerce_range(
-                    gene.power - previous_gene.power, -15, 15)
-                commands.append(ControlCommands(angle, power))
-                previous_gene = gene
-
-            new_lander = Lander(lander_init_state, commands, ground_line)
-            self.simulations.append(new_lander)
-        self.all_simulations.append(deepcopy(self.simulations))
-
-    def display_all_populations_simulation(self):
+            key = None
+            if self.cache is not None:
+                key = FitnessCache.key(scenario, member.genes.array)
+                new_lander = self.cache.get(key)
+                if new_lander is not None:
+                    simulations.append(new_lander)
+                    hits += 1
+                    continue
+                misses += 1
+
+            new_lander = Lander(lander_init_state,
+                                self.iter_commands(member, previous),
+                                terrain,
+                                self.physics, record)
+            simulations.append(new_lander)
+            if key is not None:
+                self.cache.put(key, Outcome.from_lander(new_lander))
+        if self.cache is not None:
+            self.cache.record(hits, misses)
+        return simulations
+
+    def simulate_cached(self, run, scenario):
+        """Fly the members with run(members) -> BatchResult, members
+        found in the cache and duplicates of another member are not flown
+        returns the BatchResult of every member, and the one of the
+        members not found in the cache with their index (None for all),
+        the only ones with a trajectory
+        """
+        genes = self.pool.genes
+        if self.cache is None:
+            result = run(np.arange(len(genes)))
+            return result, result, None
+
+        keys = [FitnessCache.key(scenario, row) for row in genes]
+        sources = [None] * len(genes)
+        cached = {}  # member -> Outcome
+        pending = {}  # key -> members sharing these genes
+        for i, key in enumerate(keys):
+            outcome = self.cache.get(key)
+            if outcome is not None:
+                cached[i] = outcome
+            else:
+                pending.setdefault(key, []).append(i)
+
+        if cached:
+            outcomes = outcomes_result(list(cached.values()))
+            for j, i in enumerate(cached):
+                sources[i] = (outcomes, j)
+        if pending:
+            result = run(np.array([members[0]
+                                   for members in pending.values()]))
+            for j, (key, members) in enumerate(pending.items()):
+                for i in members:
+                    sources[i] = (result, j)
+                # a copy: the cache keeps no reference to the result
+                self.cache.put(key, Outcome.from_result(result, j))
+        self.cache.record(len(genes) - len(pending), len(pending))
+
+        flown = [i for i in range(len(genes)) if i not in cached]
+        if not flown:
+            return BatchResult.gather(sources), None, None
+        return (BatchResult.gather(sources),
+                BatchResult.gather([sources[i] for i in flown]), flown)
+
+    def simulate_incremental(self, batch_engine, init_state, members,
+                             scenario, record=True):
+        """Fly members with the batch engine, reusing the flights of the
+        previous generation when checkpoint_every is set:
+        - a child whose parent ended before the first differing gene
+          gets the outcome of its parent
+        - other children resume at the last parent checkpoint before
+          the first differing gene
+        origin and divergence refer to the previous generation, so
+        flying the same generation again flies every member
+        """
+        genes = self.pool.genes[members]
+        angles, powers = genes_to_commands(
+            genes, (init_state.angle, init_state.power))
+        every = self.checkpoint_every
+        parent = self.last_result
+        if (not every or parent is None or self.last_scenario != scenario
+                or self.last_generation != self.generations - 1
+                or parent.checkpoint_every != every):
+            self.incremental_stats = {}
+            return batch_engine.simulate(init_state, angles, powers,
+                                         record=record,
+                                         checkpoint_every=every)
+
+        ticks = angles.shape[1]
+        origin = self.pool.origin[members]
+        divergence = self.pool.divergence[members]
+        has_parent = origin >= 0
+        # index of the last state of the parent flight
+        parent_end = np.where(has_parent, parent.lengths[origin] - 1, ticks)
+        copied = has_parent & (parent_end <= divergence)
+        flown = np.flatnonzero(~copied)
+        resume_tick = np.where(has_parent[flown],
+                               divergence[flown] // every * every, 0)
+
+        result = None
+        if len(flown) > 0:
+            resume = self.resume_from(parent, origin[flown], resume_tick,
+                                      ticks, every)
+            result = batch_engine.simulate(
+                init_state, angles[flown], powers[flown],
+                record=record and parent.history is not None,
+                checkpoint_every=every,
+                resume=resume)
+        self.incremental_stats = {
+            'copied': int(np.count_nonzero(copied)),
+            'resumed': int(np.count_nonzero(resume_tick)),
+            'skipped_ticks': int(resume_tick.sum()
+                                 + (parent_end[copied]).sum())}
+
+        sources = [None] * len(members)
+        for i in np.flatnonzero(copied):
+            sources[i] = (parent, origin[i])
+        for j, i in enumerate(flown):
+            sources[i] = (result, j)
+        return BatchResult.gather(sources)
+
+    def simulate_screened(self, lander_init_state, terrain, engine,
+                          record=True):
+        """Screen every member with a coarse flight and fly exactly the
+        promising ones with the engine, the report goes to
+        screening_stats, returns the simulations of every member
+        """
+        if self.screening not in SCREENINGS:
+            raise ValueError(f'Unknown screening: {self.screening}')
+        batch_engine = BatchEngine(terrain, self.physics)
+        previous = (lander_init_state.angle, lander_init_state.power)
+        angles, powers = genes_to_commands(self.pool.genes, previous)
+        coarse = coarse_flight(batch_engine, lander_init_state, angles,
+                               powers, self.screening, self.screening_step,
+                               self.screening_horizon)
+        audit = (bool(self.screening_audit)
+                 and self.generations % self.screening_audit == 0)
+        if audit:
+            flown = np.arange(len(coarse))
+        else:
+            flown = candidates(coarse, self.screening_ratio)
+
+        if engine == "object":
+            exact = [Lander(lander_init_state,
+                            self.iter_commands(self.pool[i], previous),
+                            terrain,
+                            self.physics, record) for i in flown]
+            fitness = [lander.fitness for lander in exact]
+            flystate = [lander.flystate.value for lander in exact]
+            simulations = coarse.landers()
+            for j, i in enumerate(flown):
+                simulations[i] = exact[j]
+            if record:
+                self.archive.add_landers(self.generations, exact, flown)
+        else:
+            if engine == "parallel":
+                position = lander_init_state.position
+                direction = lander_init_state.speed.direction
+                exact = self.get_evaluator().evaluate(
+                    self.pool.genes[flown], (position.x, position.y),
+                    lander_init_state.fuel, self.terrain_inputs,
+                    (direction.dx, direction.dy), lander_init_state.angle,
+                    lander_init_state.power)
+            else:
+                exact = batch_engine.simulate(lander_init_state,
+                                              angles[flown], powers[flown],
+                                              record=record)
+            fitness, flystate = exact.fitness, exact.flystate
+            simulations = merge(coarse, exact, flown).landers()
+            if record:
+                # only the exact flights have a trajectory
+                self.archive.add_result(self.generations, exact, flown)
+
+        self.screened_out = np.setdiff1d(np.arange(len(coarse)), flown)
+        report = screening_report(coarse, flown, fitness, flystate,
+                                  self.screening_ratio, audit)
+        report['generation'] = self.generations
+        self.screening_stats.append(report)
+        self.incremental_stats = {}
+        return simulations
+
+    @staticmethod
+    def resume_from(parent, origin, tick, ticks, every):
+        """Starting point of children from the checkpoints of their
+        parents, members without parent (origin -1) start at tick 0
+        whose state is the same in every checkpoint of the scenario
+        """
+        row = tick // every
+        source = np.where(origin >= 0, origin, 0)
+        state = {key: values[row, source]
+                 for key, values in parent.checkpoints.items()}
+        # rows up to the starting tick are the ones of the parent
+        checkpoints = {}
+        for key, values in parent.checkpoints.items():
+            rows = np.arange(ticks // every + 1)[:, None]
+            checkpoints[key] = np.where(rows <= row, values[:, source],
+                                        np.zeros_like(values[:1, :1]))
+        history = None
+        if parent.history is not None:
+            history = {}
+            for key, values in parent.history.items():
+                rows = np.arange(ticks + 1)[:, None]
+                history[key] = np.where(rows <= tick, values[:, source],
+                                        np.zeros_like(values[:1, :1]))
+        return {'tick': tick, 'state': state, 'checkpoints': checkpoints,
+                'history': history}
+
+    def get_evaluator(self):
+        if self.evaluator is None:
+            # multiprocessing.shared_memory is only needed from here on
+            from parallel import ParallelEvaluator
+            self.evaluator = ParallelEvaluator(self.workers, self.chunk_size,
+                                               self.physics)
+        return self.evaluator
+
+    def close(self):
+        """Stop the worker processes of the parallel engine"""
+        if self.evaluator is not None:
+            self.evaluator.close()
+            self.evaluator = None
+
+    def get_terrain(self, ground_points):
+        """Compile the ground once and reuse it while it does not change"""
+        if self.terrain is None or self.terrain_inputs != list(ground_points):
+            self.terrain = Terrain.from_inputs(ground_points)
+            self.terrain_inputs = list(ground_points)
+        return self.terrain
+
+    def display_all_populations_simulation(self, skip=1, best_k=None):
         """Plot trajectory of every chromosome of population
         for all generations
+        - skip: show one generation out of skip
+        - best_k: only show the k best members of each generation
         """
-        plt.ion()
-        plt.title(f"Simulation of generation - {self.generations}")
-        for simulations in self.all_simulations:
-            plt.clf()
-            x, y = [], []
-            for point in self.ground_points.points:
-                x.append(point.x)
-                y.append(point.y)
-            plt.plot(x, y)
-
-            for simulation in simulations:
-                x, y = [], []
-                for state in simulation.trajectory:
-                    x.append(state.position.x)
-                    y.append(state.position.y)
-                plt.plot(x, y)
-
-            plt.xlim([0, 7000])
-            plt.ylim([0, 3000])
-            plt.draw()
-            plt.pause(0.01)
+        # matplotlib is only imported when something is plotted
+        from replay import ReplayRenderer
+        ReplayRenderer(self.ground_points, self.archive, skip, best_k).show()
 
     def calculate_fitness(self):
         """calculate fitness function for every chromosome in population"""
         self.population_fitness = []
-        for simulation, member in zip(self.simulations, self.population):
-            member.fitness = simulation.fitness
-            self.population_fitness.append(member.fitness)
+        live = np.zeros(len(self.simulations), dtype=np.int64)
+        for i, simulation in enumerate(self.simulations):
+            self.pool.fitness[i] = simulation.fitness
+            self.population_fitness.append(simulation.fitness)
+            live[i] = simulation.ticks
+        if self.screened_out is not None:
+            # coarse ticks do not count the genes a flight used
+            live[self.screened_out] = self.gene_size
+        self.pool.live = live
 
     def selection(self):
-        """Create parents array and probability array
-        each element (normilized probability based on fitness score)
+        """Draw the parents of every child of the next generation
+        in one call of the selection strategy
+        - parent_indices: parents of pair i at 2*i and 2*i + 1
+        - probability: roulette probability of each member
         """
-        self.parents = []
-        self.probability = []
-        max_fitness = max(self.population_fitness)
-        total_fitness = 0.0
-
         # Based on fitness score calculate probability
         # for each parent to be choosen:
         # a higher fitness score = higher probability to be picked as a parent
         # a lower fitness score = lower probability to be picked as a parent
-        for member in self.population:
-            if member.fitness > 0:
-                self.parents.append(member)
-                normalized_fitness = member.fitness / max_fitness
-                self.probability.append(normalized_fitness)
-                total_fitness += normalized_fitness
-
-        for i in range(len(self.probability)):
-            normalized_probability = self.probability[i] / total_fitness
-            self.probability[i] = normalized_probability
+        self.probability = roulette_probability(self.pool.fitness)
+        select = get_selection(self.selection_strategy)
+        count = self.population_size // 2 * 2
+        if callable(self.selection_strategy):
+            self.parent_indices = select(self.pool.fitness, count)
+        else:
+            self.parent_indices = select(self.pool.fitness, count, self.rng)
 
     def next_generation(self):
         """Create a new generation using crossover and mutation on parents"""
-        new_population = []
-        for i in range(self.population_size // 2):
-            parent_a = np.random.choice(self.parents, p=self.probability)
-            parent_b = np.random.choice(self.parents, p=self.probability)
+        parents_a = self.parent_indices[0::2]
+        parents_b = self.parent_indices[1::2]
 
-            child1, child2 = parent_a.crossover(parent_b)
-            child1.mutate(self.mutation_rate)
-            child2.mutate(self.mutation_rate)
-            new_population.extend([child1, child2])
+        # Children of pair i are stored at 2*i and 2*i + 1
+        new_pool = self.pool.crossover(parents_a, parents_b, self.rng,
+                                       self.live_margin)
+        new_pool.mutate(self.mutation_rate, self.rng, self.live_margin)
 
         # Copy best members from current population to the new population
         # based on elitism ratio
-        pop_sort_by_fitness = sorted(self.population,
-                                     key=lambda x: x.fitness, reverse=True)
-        for j in range(int(self.population_size * self.elitism_ratio)):
-            new_population[j] = pop_sort_by_fitness[j]
+        elite = int(self.population_size * self.elitism_ratio)
+        best = best_members(self.pool.fitness, elite)
+        new_pool.genes[:elite] = self.pool.genes[best]
+        new_pool.fitness[:elite] = self.pool.fitness[best]
+        new_pool.origin[:elite] = best
+        new_pool.divergence[:elite] = self.pool.genes.shape[1]
+        if new_pool.live is not None:
+            new_pool.live[:elite] = self.pool.live[best]
 
-        self.population = new_population
+        self.pool = new_pool
         self.generations += 1
 
+    def emigrants(self, count):
+        """Genes and fitness of the count best members, best first"""
+        best = best_members(self.pool.fitness, count)
+        return self.pool.genes[best].copy(), self.pool.fitness[best].copy()
+
+    def immigrate(self, genes, fitness):
+        """Replace the worst members by members of another population
+        flown on the same scenario
+        """
+        genes = np.asarray(genes, dtype=np.int8)[:self.population_size]
+        worst = best_members(-self.pool.fitness, len(genes))
+        self.pool.genes[worst] = genes
+        self.pool.fitness[worst] = np.asarray(fitness)[:len(genes)]
+        self.pool.origin[worst] = -1
+        self.pool.divergence[worst] = 0
+        if self.pool.live is not None:
+            # flights of other populations are unknown: keep every gene
+            self.pool.live[worst] = self.gene_size
+        self.population_fitness = self.pool.fitness.tolist()
+        # flights of the replaced members can no longer be resumed
+        self.last_result = None
+
+    def best_member(self):
+        """Index of a landed member if any, else of the fittest one"""
+        for i, simulation in enumerate(self.simulations):
+            if simulation.flystate == FlyState.Landed:
+                return i
+        return int(np.argmax(self.pool.fitness))
+
     def landing_zone_reached(self):
         """Did any lander in simulations landed in landing zone?"""
         for simulation in self.simulations:
@@ -171,7 +588,4 @@ class Population():
 
     def get_max_fitness(self):
         """Find highest fitness score for the current population"""
-        max_fitness = 0
-        for member in self.population:
-            max_fitness = max(max_fitness, member.fitness)
-        return max_fitness
+        return max(0, float(self.pool.fitness.max()))
@@ -0,0 +1,110 @@
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib import animation, rcParams
+import numpy as np
+import os
+
+
+class ReplayRenderer():
+    """Replay the generations of a TrajectoryArchive
+    - terrain: ground drawn once and reused by every frame
+    - skip: draw one generation out of skip
+    - best_k: only draw the k best members of each generation
+    A whole generation is a single LineCollection artist
+    show() plots interactively, save_frames() and save_video()
+    render headless without a GUI backend
+    """
+    def __init__(self, terrain, archive, skip=1, best_k=None,
+                 xlim=(0, 7000), ylim=(0, 3000)):
+        self.terrain = terrain
+        self.archive = archive
+        self.skip = skip
+        self.best_k = best_k
+        self.xlim = xlim
+        self.ylim = ylim
+        self.colors = rcParams['axes.prop_cycle'].by_key()['color']
+        self.figure = None
+        self.collection = None
+        self.title = None
+
+    def records(self):
+        return list(self.archive)[::self.skip]
+
+    def setup(self, figure):
+        """Create the static terrain artist and the trajectory collection"""
+        self.figure = figure
+        axes = figure.add_subplot()
+        axes.plot([p.x for p in self.terrain.points],
+                  [p.y for p in self.terrain.points])
+        self.collection = LineCollection([], linewidths=1)
+        axes.add_collection(self.collection)
+        axes.set_xlim(self.xlim)
+        axes.set_ylim(self.ylim)
+        self.title = axes.set_title("")
+        return axes
+
+    def segments(self, record):
+        """Trajectories of a record as (ticks x 2) arrays, best first"""
+        members = np.argsort(-np.asarray(record.fitness), kind='stable')
+        if self.best_k is not None:
+            members = members[:self.best_k]
+        x, y = record['x'], record['y']
+        return [np.column_stack((x[i, :record.lengths[i]],
+                                 y[i, :record.lengths[i]]))
+                for i in members]
+
+    def draw_frame(self, record):
+        segments = self.segments(record)
+        self.collection.set_segments(segments)
+        # the terrain took the first color of the cycle
+        self.collection.set_color([self.colors[(i + 1) % len(self.colors)]
+                                   for i in range(len(segments))])
+        self.title.set_text(f"Simulation of generation - {record.generation}")
+        return self.collection, self.title
+
+    def show(self, pause=0.01):
+        """Replay in an interactive pyplot window"""
+        import matplotlib.pyplot as plt
+        plt.ion()
+        self.setup(plt.figure())
+        for record in self.records():
+            self.draw_frame(record)
+            plt.draw()
+            plt.pause(pause)
+
+    def headless_figure(self, dpi=100):
+        figure = Figure(dpi=dpi)
+        FigureCanvasAgg(figure)
+        self.setup(figure)
+        return figure
+
+    def save_frames(self, directory, dpi=100):
+        """Write one PNG per replayed generation, return their paths"""
+        os.makedirs(directory, exist_ok=True)
+        figure = self.headless_figure(dpi)
+        paths = []
+        for record in self.records():
+            self.draw_frame(record)
+            path = os.path.join(directory,
+                                f"generation_{record.generation:05d}.png")
+            figure.savefig(path)
+            paths.append(path)
+        return paths
+
+    def save_video(self, path, fps=10, dpi=100):
+        """Write the replay to a video file, .gif uses Pillow
+        and other extensions need ffmpeg
+        """
+        figure = self.headless_figure(dpi)
+        if path.endswith('.gif'):
+            writer = animation.PillowWriter(fps=fps)
+        elif animation.writers.is_available('ffmpeg'):
+            writer = animation.FFMpegWriter(fps=fps)
+        else:
+            raise RuntimeError('ffmpeg is needed to write ' + path)
+        with writer.saving(figure, path, dpi):
+            for record in self.records():
+                self.draw_frame(record)
+                writer.grab_frame()
+        return path
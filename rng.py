@@ -0,0 +1,107 @@
+"""Random streams of the genetic algorithm
+
+Every stochastic operator draws from a RandomStream instead of the
+random modules:
+
+    population = Population(60, 0.08, 100, rng=42)
+    streams = RandomStream(42).spawn(4)  # one per island or worker
+
+The same seed gives the same run, whatever the number of worker
+processes evaluating the members: the draws are only made by the
+process owning the population. A population built without a stream
+draws from the global NumPy RNG, so np.random.seed() still applies
+"""
+import numpy as np
+
+
+class RandomStream():
+    """Source of the random numbers of one population
+    - seed: int, list of ints, SeedSequence, or None for the global
+      numpy.random state; a seeded stream owns a PCG64 Generator
+    - every draw is a NumPy array covering a whole generation
+      (mutation draws, crossover weights, parent picks) instead of
+      one scalar per gene
+    """
+    def __init__(self, seed=None):
+        if seed is None:
+            self.seed_sequence = None
+            self.generator = None
+        else:
+            if not isinstance(seed, np.random.SeedSequence):
+                seed = np.random.SeedSequence(seed)
+            self.seed_sequence = seed
+            self.generator = np.random.Generator(np.random.PCG64(seed))
+
+    def __repr__(self):
+        if self.seed_sequence is None:
+            return "RandomStream(global)"
+        return (f"RandomStream(entropy={self.seed_sequence.entropy}, "
+                f"spawn_key={self.seed_sequence.spawn_key})")
+
+    def spawn(self, count):
+        """count independent streams, e.g. one per island"""
+        sequence = self.seed_sequence
+        if sequence is None:
+            # children of the global stream follow np.random.seed()
+            sequence = np.random.SeedSequence(
+                np.random.randint(0, 2**32, 4, dtype=np.uint64))
+        return [RandomStream(child) for child in sequence.spawn(count)]
+
+    def random(self, size=None):
+        """Floats in [0, 1)"""
+        if self.generator is None:
+            return np.random.random(size)
+        return self.generator.random(size)
+
+    def integers(self, low, high, size=None):
+        """Integers in [low, high)"""
+        if self.generator is None:
+            return np.random.randint(low, high, size)
+        return self.generator.integers(low, high, size)
+
+    def permutation(self, x):
+        if self.generator is None:
+            return np.random.permutation(x)
+        return self.generator.permutation(x)
+
+    def choice(self, a, size=None, replace=True):
+        if self.generator is None:
+            return np.random.choice(a, size, replace)
+        return self.generator.choice(a, size, replace)
+
+    def get_state(self):
+        """JSON-serializable state of a seeded stream, None for the
+        global one (saved with np.random.get_state())
+        """
+        if self.generator is None:
+            return None
+        sequence = self.seed_sequence
+        return {'bit_generator': self.generator.bit_generator.state,
+                'entropy': sequence.entropy,
+                'spawn_key': list(sequence.spawn_key),
+                'children': sequence.n_children_spawned}
+
+    @classmethod
+    def from_state(cls, state):
+        """Stream continuing exactly where get_state() was called"""
+        if state is None:
+            return cls()
+        stream = cls(np.random.SeedSequence(
+            state['entropy'], spawn_key=tuple(state['spawn_key']),
+            n_children_spawned=state['children']))
+        stream.generator.bit_generator.state = state['bit_generator']
+        return stream
+
+
+GLOBAL_STREAM = RandomStream()
+
+
+def as_stream(rng):
+    """RandomStream of an rng argument: a stream, a seed, or None for
+    the global stream
+    """
+    if rng is None:
+        return GLOBAL_STREAM
+    if isinstance(rng, RandomStream):
+        return rng
+    return RandomStream(rng)
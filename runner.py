@@ -0,0 +1,282 @@
+"""Solve many scenarios in parallel and stream the results
+
+    python runner.py scenarios.jsonl --workers 8 --output results.jsonl
+
+Every input line is one JSON scenario, either a named fixture of
+scenarios.py or an explicit terrain, with optional GA parameters:
+
+    {"id": "canyon", "scenario": "deep_canyon", "seed": 3}
+    {"id": "t1", "ground_points": ["0 100", ...], "init_position":
+     [2500, 2700], "fuel": 5000, "pop_size": 100, "time_budget": 5}
+
+One JSON line per scenario is written as soon as it is solved, in the
+order the scenarios finish
+"""
+from population import Population
+from scenarios import get_scenario
+from termination import (Termination, Landed, WallClock, MaxGenerations,
+                         MaxSimulations, Plateau, TargetFitness, Cancelled)
+from terrain import Terrain, ground_inputs_to_line
+from selection import SELECTIONS
+from lander import PHYSICS
+from multiprocessing import Pool
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+
+# Per worker process: terrains compiled by previous jobs
+_terrains = {}
+
+# GA parameters of a scenario line and their default
+DEFAULTS = {
+    'gene_size': 100,
+    'pop_size': 200,
+    'mutation_rate': 0.08,
+    'elitism_ratio': 0.1,
+    'selection_strategy': "roulette",
+    'engine': "batch",
+    'physics': "float",
+    'seed': None,
+    # stop criteria, see termination.py, None to disable one
+    'time_budget': 60.0,  # seconds
+    'max_generations': None,
+    'max_simulations': None,
+    'plateau': None,  # generations without improvement
+    'target_fitness': None,
+}
+
+# Type and bounds of the numeric fields, None for no bound
+NUMBERS = {
+    'gene_size': (int, 1, None),
+    'pop_size': (int, 2, None),
+    'mutation_rate': (float, 0, 1),
+    'elitism_ratio': (float, 0, 1),
+    'fuel': (int, 0, None),
+    'time_budget': (float, 0, None),
+    'max_generations': (int, 0, None),
+    'max_simulations': (int, 0, None),
+    'plateau': (int, 1, None),
+    'target_fitness': (float, None, None),
+}
+# fields that may be None
+OPTIONAL = ('time_budget', 'max_generations', 'max_simulations', 'plateau',
+            'target_fitness')
+
+
+def make_job(fields, defaults=None, number=0):
+    """Scenario dict of one line with every parameter filled in"""
+    job = dict(DEFAULTS)
+    job.update(defaults or {})
+    job.update(fields)
+    job.setdefault('id', number)
+    if 'scenario' in job:
+        ground_points, init_position, fuel = get_scenario(job['scenario'])
+        job.setdefault('ground_points', ground_points)
+        job.setdefault('init_position', init_position)
+        job.setdefault('fuel', fuel)
+    for key in ('ground_points', 'init_position', 'fuel'):
+        if key not in job:
+            raise ValueError(f'Scenario {job["id"]} has no {key}')
+    if job['engine'] not in ("object", "batch"):
+        raise ValueError('Jobs already run in worker processes, '
+                         'use the "object" or "batch" engine')
+    check_job(job)
+    return job
+
+
+def check_job(job):
+    """Coerce the numeric fields of a job to their type in place,
+    raise ValueError for a field no worker could use
+    """
+    name = job['id']
+    for key, (kind, low, high) in NUMBERS.items():
+        value = job[key]
+        if value is None and key in OPTIONAL:
+            continue
+        try:
+            if isinstance(value, bool):
+                raise TypeError
+            number = kind(value)
+            if kind is int and number != float(value):
+                raise ValueError
+        except (TypeError, ValueError):
+            raise ValueError(f'Scenario {name}: {key} must be '
+                             f'{"an integer" if kind is int else "a number"}'
+                             f', not {value!r}') from None
+        if (low is not None and number < low
+                or high is not None and number > high):
+            raise ValueError(f'Scenario {name}: {key} must be in '
+                             f'[{low}, {high}], not {value!r}')
+        job[key] = number
+    if (not callable(job['selection_strategy'])
+            and job['selection_strategy'] not in SELECTIONS):
+        raise ValueError(f'Scenario {name}: unknown selection strategy '
+                         f'{job["selection_strategy"]!r}')
+    if job['physics'] not in PHYSICS:
+        raise ValueError(f'Scenario {name}: unknown physics '
+                         f'{job["physics"]!r}')
+    seed = job['seed']
+    seeds = seed if isinstance(seed, list) else [seed]
+    if seed is not None and not all(
+            isinstance(value, int) and not isinstance(value, bool)
+            and value >= 0 for value in seeds):
+        raise ValueError(f'Scenario {name}: seed must be a non-negative '
+                         f'integer or a list of them, not {seed!r}')
+    position = job['init_position']
+    if (not isinstance(position, (list, tuple)) or len(position) != 2
+            or not all(isinstance(value, (int, float))
+                       and not isinstance(value, bool)
+                       for value in position)):
+        raise ValueError(f'Scenario {name}: init_position must be [x, y], '
+                         f'not {position!r}')
+    try:
+        if len(ground_inputs_to_line(job['ground_points']).points) < 2:
+            raise ValueError
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError(f'Scenario {name}: ground_points must be "x y" '
+                         f'strings') from None
+
+
+def read_jobs(lines, defaults=None, seed=None):
+    """Scenario dicts of the JSON lines
+    - seed: root seed, a line without a seed gets its own stream
+      derived from it and its line number, so results do not depend
+      on the number of workers or the order jobs finish
+    """
+    jobs = []
+    for number, line in enumerate(lines):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        job = make_job(json.loads(line), defaults, number)
+        if job['seed'] is None and seed is not None:
+            job['seed'] = [seed, number]
+        jobs.append(job)
+    return jobs
+
+
+def compiled_terrain(ground_points):
+    """Terrain of the ground points, compiled once per process"""
+    key = tuple(ground_points)
+    if key not in _terrains:
+        _terrains[key] = Terrain.from_inputs(ground_points)
+    return _terrains[key]
+
+
+def job_criteria(job):
+    criteria = [Landed()]
+    if job['time_budget'] is not None:
+        criteria.append(WallClock(job['time_budget']))
+    if job['max_generations'] is not None:
+        criteria.append(MaxGenerations(job['max_generations']))
+    if job['max_simulations'] is not None:
+        criteria.append(MaxSimulations(job['max_simulations']))
+    if job['plateau'] is not None:
+        criteria.append(Plateau(job['plateau']))
+    if job['target_fitness'] is not None:
+        criteria.append(TargetFitness(job['target_fitness']))
+    return criteria
+
+
+def solve(job, progress=None, cancelled=None):
+    """Evolve one scenario until a member lands or another criterion
+    of the job is reached, see job_criteria
+    - progress: called as progress(population) after every generation
+    - cancelled: function, the job stops when it returns True
+    """
+    start = time.perf_counter()
+    try:
+        population = Population(job['gene_size'], job['mutation_rate'],
+                                job['pop_size'], rng=job['seed'])
+        population.elitism_ratio = job['elitism_ratio']
+        population.selection_strategy = job['selection_strategy']
+        population.engine = job['engine']
+        population.physics = job['physics']
+        population.archive.retention = "none"
+        population.terrain = compiled_terrain(job['ground_points'])
+        population.terrain_inputs = list(job['ground_points'])
+        scenario = (job['init_position'], job['fuel'], job['ground_points'])
+        criteria = job_criteria(job)
+        if cancelled is not None:
+            criteria.append(Cancelled(cancelled))
+        termination = Termination(criteria)
+
+        population.simulate(*scenario)
+        population.calculate_fitness()
+        population.landing_zone_reached()
+        termination.start(population)
+        if progress is not None:
+            progress(population)
+        while termination.check(population) is None:
+            population.selection()
+            population.next_generation()
+            population.simulate(*scenario)
+            population.calculate_fitness()
+            population.landing_zone_reached()
+            if progress is not None:
+                progress(population)
+
+        result = termination.result(job['ground_points'],
+                                    job['init_position'], job['fuel'],
+                                    job['physics'])
+        return {'id': job['id'],
+                'status': result['reason'],
+                'generations': population.generations,
+                'wall_time': time.perf_counter() - start,
+                'fitness': result['fitness'],
+                'flystate': result['flystate'],
+                'commands': result['commands'],
+                'final_state': result['final_state']}
+    except Exception:
+        return {'id': job['id'],
+                'status': "error",
+                'wall_time': time.perf_counter() - start,
+                'error': traceback.format_exc()}
+
+
+def run(jobs, workers=None, output=sys.stdout):
+    """Solve the jobs on at most workers processes, write every result
+    to output as soon as it is known, return the number of landings
+    """
+    landed = 0
+    with Pool(min(workers or os.cpu_count(), max(len(jobs), 1))) as pool:
+        for result in pool.imap_unordered(solve, jobs):
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+            landed += result['status'] == "landed"
+    return landed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scenarios', help='JSONL file, - for stdin')
+    parser.add_argument('--output', help='JSONL file, stdout by default')
+    parser.add_argument('--workers', type=int,
+                        help='worker processes, all cores by default')
+    parser.add_argument('--time-budget', type=float,
+                        help='seconds per scenario unless set by the line')
+    parser.add_argument('--seed', type=int,
+                        help='root seed of the lines without a seed')
+    args = parser.parse_args(argv)
+
+    defaults = {}
+    if args.time_budget is not None:
+        defaults['time_budget'] = args.time_budget
+    if args.scenarios == '-':
+        jobs = read_jobs(sys.stdin, defaults, args.seed)
+    else:
+        with open(args.scenarios) as f:
+            jobs = read_jobs(f, defaults, args.seed)
+    if args.output:
+        with open(args.output, 'w') as output:
+            landed = run(jobs, args.workers, output)
+    else:
+        landed = run(jobs, args.workers)
+    print(f"{landed}/{len(jobs)} scenarios landed", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
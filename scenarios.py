@@ -0,0 +1,44 @@
+from collections import namedtuple
+
+# ground_points: "x y" strings as read from the game inputs
+Scenario = namedtuple("Scenario", ["ground_points", "init_position", "fuel"])
+
+SCENARIOS = {
+    # the scenario of evolution.py
+    "default": Scenario(["0 100", "1000 500", "1500 1500", "3000 1000",
+                         "4000 150", "5500 150", "6999 800"],
+                        (2500, 2700), 5000),
+    # landing zone right below the start
+    "straight_down": Scenario(["0 1500", "1000 2000", "2000 500",
+                               "3500 500", "5000 1500", "6999 1000"],
+                              (2750, 2700), 1000),
+    # landing zone far on the left, behind a peak
+    "far_left": Scenario(["0 100", "1000 500", "1500 100", "3000 100",
+                          "3500 500", "3700 200", "5000 1500", "5800 300",
+                          "6000 1000", "6999 2000"],
+                         (6500, 2800), 2000),
+    # landing zone at the bottom of a narrow canyon
+    "deep_canyon": Scenario(["0 1000", "300 1500", "350 1400", "500 2000",
+                             "800 1800", "1000 2500", "1200 2100",
+                             "1500 2400", "2000 1000", "2200 500",
+                             "2500 100", "2900 800", "3000 500",
+                             "3200 1000", "3500 2000", "3800 800",
+                             "4000 200", "5000 200", "5500 1500",
+                             "6999 2800"],
+                            (500, 2700), 2000),
+    # landing zone on a high plateau, lower ground everywhere else
+    "high_ground": Scenario(["0 1000", "300 1500", "350 1400", "500 2100",
+                             "1500 2100", "2000 200", "2500 500",
+                             "2900 300", "3000 200", "3200 1000",
+                             "3500 500", "3800 800", "4000 200",
+                             "4200 800", "4800 600", "5000 1200",
+                             "5500 900", "6000 500", "6500 300",
+                             "6999 500"],
+                            (6500, 2700), 2000),
+}
+
+
+def get_scenario(name):
+    if name not in SCENARIOS:
+        raise ValueError(f'Unknown scenario: {name}')
+    return SCENARIOS[name]
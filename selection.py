@@ -0,0 +1,107 @@
+"""Parent selection strategies
+
+Every strategy draws all the parents of a generation at once:
+select(fitness, count, rng) -> array of count member indices,
+rng is a RandomStream (see rng.py), the global stream when omitted
+"""
+from rng import as_stream
+import numpy as np
+
+
+def roulette_probability(fitness):
+    """Probability of each member to be picked, proportional to
+    its fitness, members with a fitness of 0 or less are never picked
+    """
+    fitness = np.asarray(fitness, dtype=float)
+    weights = np.where(fitness > 0, fitness, 0.0)
+    if weights.max() <= 0:
+        raise ValueError('No member with a positive fitness to select!')
+    weights = weights / weights.max()
+    return weights / weights.sum()
+
+
+def roulette(fitness, count, rng=None):
+    """Fitness proportionate selection"""
+    cumulative = np.cumsum(roulette_probability(fitness))
+    picks = np.searchsorted(cumulative,
+                            as_stream(rng).random(count) * cumulative[-1],
+                            side='right')
+    return np.minimum(picks, len(cumulative) - 1)
+
+
+def stochastic_universal(fitness, count, rng=None):
+    """Stochastic universal sampling: count evenly spaced pointers
+    on the roulette wheel, shuffled so that pairs are random
+    """
+    rng = as_stream(rng)
+    cumulative = np.cumsum(roulette_probability(fitness))
+    step = cumulative[-1] / count
+    pointers = rng.random() * step + step * np.arange(count)
+    picks = np.searchsorted(cumulative, pointers, side='right')
+    return rng.permutation(np.minimum(picks, len(cumulative) - 1))
+
+
+def tournament(fitness, count, rng=None, size=3):
+    """Best of size members drawn at random, for every pick"""
+    fitness = np.asarray(fitness, dtype=float)
+    contenders = as_stream(rng).integers(0, len(fitness), (count, size))
+    winners = np.argmax(fitness[contenders], axis=1)
+    return contenders[np.arange(count), winners]
+
+
+def rank(fitness, count, rng=None, pressure=1.5):
+    """Linear ranking: the probability depends on the rank only,
+    pressure (between 1 and 2) is the expected number of picks
+    of the best member per population size
+    """
+    fitness = np.asarray(fitness, dtype=float)
+    n = len(fitness)
+    ranks = np.empty(n)
+    ranks[np.argsort(fitness, kind='stable')] = np.arange(n)
+    if n > 1:
+        weights = ((2 - pressure) / n
+                   + 2 * ranks * (pressure - 1) / (n * (n - 1)))
+    else:
+        weights = np.ones(1)
+    cumulative = np.cumsum(weights)
+    picks = np.searchsorted(cumulative,
+                            as_stream(rng).random(count) * cumulative[-1],
+                            side='right')
+    return np.minimum(picks, n - 1)
+
+
+SELECTIONS = {
+    "roulette": roulette,
+    "sus": stochastic_universal,
+    "tournament": tournament,
+    "rank": rank,
+}
+
+
+def get_selection(strategy):
+    """Selection function from a name of SELECTIONS or a callable"""
+    if callable(strategy):
+        return strategy
+    if strategy not in SELECTIONS:
+        raise ValueError(f'Unknown selection strategy: {strategy}')
+    return SELECTIONS[strategy]
+
+
+def best_members(fitness, count):
+    """Index of the count best members, best first
+    (ties keep the population order, like a stable sort)
+    """
+    fitness = np.asarray(fitness, dtype=float)
+    count = min(count, len(fitness))
+    if count <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if count < len(fitness):
+        # members strictly better than the k-th best, then the ties
+        kth = -np.partition(-fitness, count - 1)[count - 1]
+        better = np.flatnonzero(fitness > kth)
+        ties = np.flatnonzero(fitness == kth)[:count - len(better)]
+        candidates = np.concatenate((better, ties))
+    else:
+        candidates = np.arange(len(fitness))
+    order = np.lexsort((candidates, -fitness[candidates]))
+    return candidates[order]
@@ -0,0 +1,346 @@
+"""Local asyncio evaluation service
+
+    python service.py --port 8765 --workers 4 --queue 64
+
+Clients connect over TCP and exchange JSON lines, jobs are the
+scenario lines of runner.py:
+
+    {"op": "submit", "job": {"scenario": "default", "seed": 1}}
+      -> {"event": "accepted", "job_id": 1}
+         or {"event": "rejected", "error": "..."} when the queue is full
+      -> {"event": "progress", "job_id": 1, "generation": 3, ...}
+      -> {"event": "result", "job_id": 1, "result": {...}}
+    {"op": "cancel", "job_id": 1} -> {"event": "cancelled", "job_id": 1}
+    {"op": "status"} -> {"event": "status", "queued": 2, "running": 4}
+
+Every accepted job ends with exactly one result event, a cancelled job
+with the status "cancelled". ServiceClient speaks this protocol
+"""
+from runner import make_job, solve, compiled_terrain
+from scenarios import SCENARIOS
+from engine import acceleration_table
+from lander import acceleration_rows
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+
+# Per worker process, set by _init_worker
+_progress = None
+_cancelled = None
+
+
+def _init_worker(progress, cancelled):
+    """Keep the shared queues and compile what every job needs"""
+    global _progress, _cancelled
+    _progress, _cancelled = progress, cancelled
+    acceleration_rows()
+    acceleration_table()
+    for scenario in SCENARIOS.values():
+        compiled_terrain(scenario.ground_points)
+
+
+def _warm_up():
+    # a task that lasts long enough for every worker to be started
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def _run_job(job_id, job, progress_every):
+    """Worker side: solve a job, sending progress and polling for
+    its cancellation after every generation
+    """
+    start = time.perf_counter()
+
+    def progress(population):
+        if population.generations % progress_every == 0:
+            fitness = population.pool.fitness
+            _progress.put((job_id, {
+                'generation': population.generations,
+                'max_fitness': float(fitness.max()),
+                'mean_fitness': float(fitness.mean()),
+                'elapsed': time.perf_counter() - start}))
+
+    def cancelled():
+        return job_id in _cancelled
+
+    return solve(job, progress, cancelled)
+
+
+class EvaluationService():
+    """Solve scenario jobs for local clients
+    - workers: processes of the pool, started and warmed up by start()
+    - queue_size: jobs waiting for a worker, more are rejected
+    - progress_every: generations between progress events
+    """
+    def __init__(self, workers=None, queue_size=64, progress_every=1):
+        self.workers = workers or os.cpu_count()
+        self.queue_size = queue_size
+        self.progress_every = progress_every
+        self.jobs = {}  # job_id -> {'writer', 'state'}
+        self.writers = set()  # one per connected client
+        self.stopping = False
+        self.job_ids = itertools.count(1)
+        self.queue = None
+        self.manager = None
+        self.progress = None
+        self.cancelled = None
+        self.executor = None
+        self.server = None
+        self.tasks = []
+        self.port = None
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Start and warm up the workers, then listen on host:port
+        (port 0 picks a free port, see self.port)
+        """
+        loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(self.queue_size)
+        self.manager = multiprocessing.Manager()
+        self.progress = multiprocessing.Queue()
+        self.cancelled = self.manager.dict()
+        self.executor = ProcessPoolExecutor(
+            self.workers, initializer=_init_worker,
+            initargs=(self.progress, self.cancelled))
+        await asyncio.gather(*[loop.run_in_executor(self.executor, _warm_up)
+                               for _ in range(self.workers)])
+        self.tasks = [asyncio.create_task(self.dispatch())
+                      for _ in range(self.workers)]
+        self.tasks.append(asyncio.create_task(self.forward_progress()))
+        self.server = await asyncio.start_server(self.handle, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        """Stop listening, drop the clients and their jobs, then the
+        workers and last the manager they poll for cancellations
+        """
+        self.stopping = True
+        self.server.close()
+        for job_id, entry in self.jobs.items():
+            if entry['state'] == 'running':
+                self.cancelled[job_id] = True
+        for writer in list(self.writers):
+            writer.close()
+        self.jobs.clear()
+        await self.server.wait_closed()
+        for task in self.tasks:
+            task.cancel()
+        self.progress.put(None)
+        # the running jobs end at their next generation
+        await asyncio.to_thread(self.executor.shutdown, wait=True,
+                                cancel_futures=True)
+        self.manager.shutdown()
+
+    def write(self, writer, event):
+        if not writer.is_closing():
+            writer.write((json.dumps(event) + '\n').encode())
+
+    async def handle(self, reader, writer):
+        """One client connection"""
+        self.writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    op = message.get('op')
+                    if op == 'submit':
+                        self.submit(message.get('job', {}), writer)
+                    elif op == 'cancel':
+                        self.cancel(message.get('job_id'), writer)
+                    elif op == 'status':
+                        self.write(writer, self.status())
+                    else:
+                        raise ValueError(f'Unknown op: {op}')
+                except (ValueError, AttributeError) as error:
+                    self.write(writer, {'event': 'error',
+                                        'error': str(error)})
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # client gone, or the service stopping
+            pass
+        finally:
+            # the jobs of a client that left are not needed anymore
+            for job_id, entry in list(self.jobs.items()):
+                if entry['writer'] is writer:
+                    self.withdraw(job_id)
+            self.writers.discard(writer)
+            writer.close()
+
+    def submit(self, fields, writer):
+        if self.queue.full():
+            self.write(writer, {'event': 'rejected',
+                                'error': 'The job queue is full'})
+            return
+        job_id = next(self.job_ids)
+        job = make_job(fields, number=job_id)
+        # accepted is written before any event of the job
+        self.write(writer, {'event': 'accepted', 'job_id': job_id})
+        self.jobs[job_id] = {'writer': writer, 'state': 'queued'}
+        self.queue.put_nowait((job_id, job))
+
+    def cancel(self, job_id, writer):
+        entry = self.jobs.get(job_id)
+        if entry is None or entry['writer'] is not writer:
+            raise ValueError(f'No job {job_id} to cancel')
+        self.write(writer, {'event': 'cancelled', 'job_id': job_id})
+        self.withdraw(job_id)
+
+    def withdraw(self, job_id):
+        """Drop a queued job, or ask its worker to stop"""
+        if self.stopping:
+            # stop() already cancelled every job
+            return
+        entry = self.jobs[job_id]
+        if entry['state'] == 'queued':
+            entry['state'] = 'cancelled'
+            del self.jobs[job_id]
+            self.write(entry['writer'], {
+                'event': 'result', 'job_id': job_id,
+                'result': {'id': job_id, 'status': 'cancelled'}})
+        else:
+            self.cancelled[job_id] = True
+
+    def status(self):
+        running = sum(entry['state'] == 'running'
+                      for entry in self.jobs.values())
+        return {'event': 'status', 'queued': self.queue.qsize(),
+                'running': running, 'workers': self.workers,
+                'queue_size': self.queue_size}
+
+    async def dispatch(self):
+        """Run queued jobs one at a time on the pool"""
+        loop = asyncio.get_running_loop()
+        while True:
+            job_id, job = await self.queue.get()
+            entry = self.jobs.get(job_id)
+            if entry is None or entry['state'] != 'queued':
+                continue
+            entry['state'] = 'running'
+            result = await loop.run_in_executor(
+                self.executor, _run_job, job_id, job, self.progress_every)
+            self.jobs.pop(job_id, None)
+            self.cancelled.pop(job_id, None)
+            self.write(entry['writer'], {'event': 'result', 'job_id': job_id,
+                                         'result': result})
+
+    async def forward_progress(self):
+        """Send the progress of the workers to the clients"""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await loop.run_in_executor(None, self.progress.get)
+            if item is None:
+                break
+            job_id, progress = item
+            entry = self.jobs.get(job_id)
+            if entry is not None:
+                self.write(entry['writer'], {'event': 'progress',
+                                             'job_id': job_id, **progress})
+
+
+class ServiceClient():
+    """Asyncio client of an EvaluationService
+
+        client = await ServiceClient.connect(port=8765)
+        job_id = await client.submit({"scenario": "default"})
+        async for event in client.events(job_id):
+            ...
+    """
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.replies = asyncio.Queue()
+        self.streams = {}  # job_id -> queue of progress and result events
+        self.listener = asyncio.create_task(self.listen())
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=8765):
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def listen(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            event = json.loads(line)
+            if event['event'] in ('progress', 'result'):
+                self.stream(event['job_id']).put_nowait(event)
+            else:
+                self.replies.put_nowait(event)
+
+    def stream(self, job_id):
+        return self.streams.setdefault(job_id, asyncio.Queue())
+
+    async def request(self, message):
+        self.writer.write((json.dumps(message) + '\n').encode())
+        await self.writer.drain()
+        reply = await self.replies.get()
+        if reply['event'] in ('rejected', 'error'):
+            raise RuntimeError(reply['error'])
+        return reply
+
+    async def submit(self, job):
+        """Queue a job, return its id"""
+        reply = await self.request({'op': 'submit', 'job': job})
+        return reply['job_id']
+
+    async def cancel(self, job_id):
+        await self.request({'op': 'cancel', 'job_id': job_id})
+
+    async def status(self):
+        return await self.request({'op': 'status'})
+
+    async def events(self, job_id):
+        """Progress events of a job, then its result event"""
+        stream = self.stream(job_id)
+        while True:
+            event = await stream.get()
+            yield event
+            if event['event'] == 'result':
+                del self.streams[job_id]
+                return
+
+    async def result(self, job_id):
+        async for event in self.events(job_id):
+            if event['event'] == 'result':
+                return event['result']
+
+    async def close(self):
+        self.writer.close()
+        self.listener.cancel()
+
+
+async def serve(host, port, workers, queue_size, progress_every):
+    service = EvaluationService(workers, queue_size, progress_every)
+    await service.start(host, port)
+    print(f"Listening on {host}:{service.port}")
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int,
+                        help='worker processes, all cores by default')
+    parser.add_argument('--queue', type=int, default=64,
+                        help='jobs waiting for a worker')
+    parser.add_argument('--progress-every', type=int, default=1,
+                        help='generations between progress events')
+    args = parser.parse_args(argv)
+    asyncio.run(serve(args.host, args.port, args.workers, args.queue,
+                      args.progress_every))
+
+
+if __name__ == "__main__":
+    main()
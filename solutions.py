@@ -0,0 +1,131 @@
+from terrain import Terrain, MAX_X
+from chromosome import GenePool
+import numpy as np
+import json
+import os
+
+# ground heights sampled for the terrain profile of a scenario
+PROFILE_SAMPLES = 16
+MAX_Y = 3000
+MAX_FUEL = 10000
+
+
+def scenario_features(ground_points, init_position, fuel):
+    """Vector describing a scenario, close vectors for similar ones
+    - landing zone center and width
+    - start position relative to the landing zone, fuel
+    - ground profile: heights at evenly spaced x
+    Positions are scaled by the map size, fuel by MAX_FUEL
+    """
+    terrain = Terrain.from_inputs(ground_points)
+    if terrain.landing_zone is None:
+        raise ValueError('Ground should have a flat landing zone!')
+    left, right = terrain.landing_zone
+    center_x, center_y = (left.x + right.x) / 2, left.y
+    x, y = init_position
+    samples = np.linspace(terrain.min_x, terrain.max_x, PROFILE_SAMPLES)
+    profile = np.nan_to_num(terrain.heights_at(samples)) / MAX_Y
+    return np.concatenate((
+        [center_x / MAX_X, center_y / MAX_Y, (right.x - left.x) / MAX_X,
+         (x - center_x) / MAX_X, (y - center_y) / MAX_Y, fuel / MAX_FUEL],
+        profile))
+
+
+def fit_genes(genes, gene_size):
+    """Cut genes to gene_size, or repeat the last gene up to it"""
+    if len(genes) >= gene_size:
+        return genes[:gene_size]
+    padding = np.repeat(genes[-1:], gene_size - len(genes), axis=0)
+    return np.concatenate((genes, padding))
+
+
+class SolutionStore():
+    """Directory of solved scenarios used to seed new populations
+    - every solution is one .npz file: genes, features of its scenario,
+      fitness and the scenario itself as JSON
+    - nearest() finds the solutions of the most similar scenarios
+      by euclidean distance between scenario_features
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.features = None  # (solutions x features), loaded on demand
+        self.paths = []
+
+    def __len__(self):
+        return len(self.load_index()[1])
+
+    def load_index(self):
+        if self.features is None:
+            self.paths = sorted(
+                os.path.join(self.directory, name)
+                for name in os.listdir(self.directory)
+                if name.startswith('solution_') and name.endswith('.npz'))
+            features = []
+            for path in self.paths:
+                with np.load(path) as data:
+                    features.append(data['features'])
+            self.features = np.array(features)
+        return self.features, self.paths
+
+    def add(self, ground_points, init_position, fuel, genes, fitness=1.0):
+        """Store the genes (gene_size x 2) solving a scenario"""
+        features = scenario_features(ground_points, init_position, fuel)
+        scenario = {'ground_points': list(ground_points),
+                    'init_position': list(init_position), 'fuel': fuel}
+        number = len(os.listdir(self.directory))
+        while True:
+            path = os.path.join(self.directory,
+                                f'solution_{number:06d}.npz')
+            if not os.path.exists(path):
+                break
+            number += 1
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as f:
+            np.savez_compressed(f, genes=np.asarray(genes, dtype=np.int8),
+                                features=features, fitness=fitness,
+                                scenario=np.array(json.dumps(scenario)))
+        os.replace(temporary, path)
+        self.features = None
+        return path
+
+    def nearest(self, ground_points, init_position, fuel, count):
+        """Genes of the count solutions closest to a scenario,
+        closest first, as (genes, distance) pairs
+        """
+        features, paths = self.load_index()
+        if len(paths) == 0 or count <= 0:
+            return []
+        target = scenario_features(ground_points, init_position, fuel)
+        distances = np.linalg.norm(features - target, axis=1)
+        solutions = []
+        for i in np.argsort(distances, kind='stable')[:count]:
+            with np.load(paths[i]) as data:
+                solutions.append((data['genes'], float(distances[i])))
+        return solutions
+
+    def seed(self, population, ground_points, init_position, fuel,
+             ratio=0.2):
+        """Replace the first ratio of the population members by the
+        nearest solutions, mutated copies when there are fewer
+        solutions than seeded members, returns the number of solutions
+        used
+        """
+        count = int(population.population_size * ratio)
+        solutions = self.nearest(ground_points, init_position, fuel, count)
+        if not solutions:
+            return 0
+        genes = np.array([fit_genes(genes, population.gene_size)
+                          for genes, _ in solutions], dtype=np.int8)
+        genes = np.resize(genes, (count,) + genes.shape[1:])
+        if count > len(solutions):
+            # mutate the repeated solutions in place
+            GenePool(genes[len(solutions):]).mutate(population.mutation_rate,
+                                                    population.rng)
+        pool = population.pool
+        pool.genes[:count] = genes
+        pool.fitness[:count] = 0
+        pool.origin[:count] = -1
+        pool.divergence[:count] = 0
+        population.last_result = None
+        return len(solutions)
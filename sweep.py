@@ -0,0 +1,281 @@
+"""Hyperparameter sweep with successive halving
+
+    python sweep.py --scenarios default deep_canyon --seeds 3 \\
+        --mutation-rate 0.04 0.08 0.12 --pop-size 100 200 --cache sweep
+
+Every configuration of the grid is flown on every (scenario, seed)
+trial with a small generation budget, only the best 1 / eta of the
+configurations are promoted to the next rung with eta times the budget.
+Configurations are ranked by success rate (trials landed), then by
+mean time to landing.
+
+Trials run in parallel with runner.solve and seeded random streams, so
+a trial always gives the same flight. They are cached as JSON lines in
+the cache directory: an interrupted sweep resumes where it stopped, and
+a trial that landed within a smaller budget is not flown again
+"""
+from runner import make_job, solve
+from scenarios import SCENARIOS
+from multiprocessing import Pool
+import numpy as np
+import argparse
+import itertools
+import json
+import os
+import sys
+
+# Parameters swept by default and their values
+GRID = {
+    'mutation_rate': [0.04, 0.08, 0.12],
+    'pop_size': [100, 200],
+    'gene_size': [100],
+    'elitism_ratio': [0.1, 0.2],
+}
+
+
+def configurations(grid):
+    """Every combination of the grid values, as dicts"""
+    names = sorted(grid)
+    return [dict(zip(names, values))
+            for values in itertools.product(*(grid[name] for name in names))]
+
+
+def trial_key(config, scenario, seed):
+    return json.dumps([config, scenario, seed], sort_keys=True)
+
+
+class TrialCache():
+    """Outcome of the trials already flown, appended to trials.jsonl
+    - a landed trial stands for every budget from its generations on
+    - a trial that did not land stands for every smaller budget
+    """
+    def __init__(self, directory=None):
+        self.path = None
+        self.trials = {}  # trial_key -> list of outcomes
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self.path = os.path.join(directory, 'trials.jsonl')
+            if os.path.exists(self.path):
+                with open(self.path) as f:
+                    for line in f:
+                        # a sweep killed while writing leaves a partial line
+                        try:
+                            outcome = json.loads(line)
+                        except ValueError:
+                            continue
+                        self.remember(outcome)
+
+    def remember(self, outcome):
+        key = trial_key(outcome['config'], outcome['scenario'],
+                        outcome['seed'])
+        self.trials.setdefault(key, []).append(outcome)
+
+    def get(self, config, scenario, seed, budget):
+        """Outcome of the trial flown with budget generations or None"""
+        for outcome in self.trials.get(trial_key(config, scenario, seed), []):
+            if outcome['landed'] and outcome['generations'] <= budget:
+                return outcome
+            # a trial stopped by its time budget may land if flown again
+            if (outcome['status'] == "max_generations"
+                    and outcome['budget'] >= budget):
+                return outcome
+        return None
+
+    def put(self, outcome):
+        self.remember(outcome)
+        if self.path is not None:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(outcome) + '\n')
+
+
+def trial_job(config, scenario, seed, budget, settings):
+    fields = dict(settings)
+    fields.update(config)
+    fields.update(scenario=scenario, seed=seed, max_generations=budget,
+                  id=trial_key(config, scenario, seed))
+    return make_job(fields)
+
+
+def _run_trial(task):
+    index, config, scenario, seed, budget, job = task
+    result = solve(job)
+    outcome = {'config': config, 'scenario': scenario, 'seed': seed,
+               'budget': budget, 'status': result['status'],
+               'landed': result['status'] == "landed",
+               'generations': result.get('generations'),
+               'fitness': result.get('fitness'),
+               'wall_time': result['wall_time'],
+               'error': result.get('error')}
+    return index, outcome
+
+
+def score(outcomes):
+    """Success rate, mean time and generations to landing of the
+    landed trials (None if none landed), mean best fitness and trials
+    """
+    landed = [outcome for outcome in outcomes if outcome['landed']]
+    return {'success_rate': len(landed) / len(outcomes),
+            'time_to_landing': (float(np.mean([outcome['wall_time']
+                                               for outcome in landed]))
+                                if landed else None),
+            'generations_to_landing': (float(np.mean(
+                [outcome['generations'] for outcome in landed]))
+                if landed else None),
+            'fitness': float(np.mean([outcome['fitness']
+                                      for outcome in outcomes])),
+            'trials': len(outcomes)}
+
+
+def rank_key(row):
+    """Most landings first, then fastest, then fittest"""
+    time = row['time_to_landing']
+    return (-row['success_rate'], time if time is not None else np.inf,
+            -row['fitness'])
+
+
+class Sweep():
+    """Successive halving over the configurations of a grid
+    - scenarios: names of scenarios.py, seeds: seeds per scenario
+    - min_budget: generations of the first rung, eta: budget factor and
+      promotion ratio between rungs, rungs: number of rungs
+    - settings: job fields shared by every trial (engine, time_budget)
+    - cache: directory of the trial cache, None to keep it in memory
+    """
+    def __init__(self, grid=None, scenarios=("default",), seeds=3,
+                 min_budget=20, eta=3, rungs=3, settings=None, cache=None,
+                 workers=None):
+        self.configs = configurations(grid or GRID)
+        self.scenarios = list(scenarios)
+        if isinstance(seeds, int):
+            seeds = range(seeds)
+        self.seeds = list(seeds)
+        self.min_budget = min_budget
+        self.eta = eta
+        self.rungs = rungs
+        self.settings = {'time_budget': 600.0, 'engine': "batch"}
+        self.settings.update(settings or {})
+        self.cache = TrialCache(cache)
+        self.workers = workers
+        self.rows = []  # ranked table, see run
+        self.flown = 0  # trials flown, the others came from the cache
+
+    def budget(self, rung):
+        return self.min_budget * self.eta ** rung
+
+    def evaluate(self, configs, budget, pool, log=None):
+        """Outcomes of every trial of configs, flying the missing ones"""
+        outcomes = {}
+        tasks = []
+        for index, config in enumerate(configs):
+            for scenario in self.scenarios:
+                for seed in self.seeds:
+                    outcome = self.cache.get(config, scenario, seed, budget)
+                    if outcome is not None:
+                        outcomes.setdefault(index, []).append(outcome)
+                        continue
+                    job = trial_job(config, scenario, seed, budget,
+                                    self.settings)
+                    tasks.append((index, config, scenario, seed, budget,
+                                  job))
+        for index, outcome in pool.imap_unordered(_run_trial, tasks):
+            if outcome['status'] == "error":
+                raise RuntimeError(f'Trial failed: {outcome["error"]}')
+            self.cache.put(outcome)
+            self.flown += 1
+            outcomes.setdefault(index, []).append(outcome)
+            if log is not None:
+                print(f"budget {budget:>5} {outcome['scenario']:>13} "
+                      f"seed {outcome['seed']:<3} {outcome['status']:>15} "
+                      f"{outcome['config']}", file=log)
+        return [outcomes[index] for index in range(len(configs))]
+
+    def run(self, log=None):
+        """Run every rung, return the ranked rows: config, rung reached,
+        budget and the score of its last rung
+        """
+        survivors = self.configs
+        reached = {}
+        with Pool(self.workers or os.cpu_count()) as pool:
+            for rung in range(self.rungs):
+                budget = self.budget(rung)
+                outcomes = self.evaluate(survivors, budget, pool, log)
+                rows = []
+                for config, trials in zip(survivors, outcomes):
+                    row = {'config': config, 'rung': rung,
+                           'budget': budget}
+                    row.update(score(trials))
+                    rows.append(row)
+                    reached[json.dumps(config, sort_keys=True)] = row
+                rows.sort(key=rank_key)
+                if rung < self.rungs - 1:
+                    keep = max(1, len(rows) // self.eta)
+                    survivors = [row['config'] for row in rows[:keep]]
+        # deeper rungs first, then by score within a rung
+        self.rows = sorted(reached.values(),
+                           key=lambda row: (-row['rung'],) + rank_key(row))
+        return self.rows
+
+    def table(self):
+        """Ranked text table of the configurations"""
+        names = sorted(self.rows[0]['config']) if self.rows else []
+        widths = {name: max(len(name), 8) for name in names}
+        header = ' '.join(f'{name:>{widths[name]}}' for name in names)
+        lines = [f"{'rank':>4} {header} {'rung':>4} {'budget':>6} "
+                 f"{'success':>8} {'time (s)':>9} {'generations':>11} "
+                 f"{'fitness':>8}"]
+        for rank, row in enumerate(self.rows, 1):
+            values = ' '.join(f"{row['config'][name]!s:>{widths[name]}}"
+                              for name in names)
+            time = row['time_to_landing']
+            time = '-' if time is None else f'{time:.2f}'
+            generations = row['generations_to_landing']
+            generations = '-' if generations is None else f'{generations:.1f}'
+            lines.append(
+                f"{rank:>4} {values} {row['rung']:>4} {row['budget']:>6} "
+                f"{row['success_rate']:>8.0%} {time:>9} {generations:>11} "
+                f"{row['fitness']:>8.4f}")
+        return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', nargs='+', default=["default"],
+                        choices=list(SCENARIOS))
+    parser.add_argument('--seeds', type=int, default=3,
+                        help='seeds per scenario')
+    for name, values in GRID.items():
+        parser.add_argument('--' + name.replace('_', '-'), nargs='+',
+                            type=type(values[0]), default=values)
+    parser.add_argument('--selection-strategy', nargs='+',
+                        default=["roulette"])
+    parser.add_argument('--min-budget', type=int, default=20,
+                        help='generations of the first rung')
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--rungs', type=int, default=3)
+    parser.add_argument('--engine', default="batch",
+                        choices=["object", "batch"])
+    parser.add_argument('--time-budget', type=float, default=600.0,
+                        help='seconds a trial may run at most')
+    parser.add_argument('--cache', help='directory of the trial cache')
+    parser.add_argument('--workers', type=int,
+                        help='worker processes, all cores by default')
+    parser.add_argument('--output', help='JSON file of the ranked rows')
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args(argv)
+
+    grid = {name: getattr(args, name) for name in GRID}
+    grid['selection_strategy'] = args.selection_strategy
+    sweep = Sweep(grid, args.scenarios, args.seeds, args.min_budget,
+                  args.eta, args.rungs,
+                  {'engine': args.engine, 'time_budget': args.time_budget},
+                  args.cache, args.workers)
+    sweep.run(None if args.quiet else sys.stderr)
+    print(sweep.table())
+    print(f"{sweep.flown} trials flown", file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(sweep.rows, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
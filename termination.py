@@ -0,0 +1,207 @@
+"""Stop criteria of an evolution and best-so-far tracking
+
+    termination = Termination([Landed(), WallClock(10), Plateau(50)])
+    termination.start(population)
+    while termination.check(population) is None:
+        ... one generation ...
+    result = termination.result(ground_points, init_position, fuel)
+
+A criterion has a reason, start(population) called once before the
+first generation and reached(population) called after every one
+"""
+from lander import Lander, State, FlyState, ControlCommands
+from plane import Point, Vector
+from motion import Speed, Particle
+from terrain import Terrain
+from engine import genes_to_commands
+import time
+
+
+class Landed():
+    """A member of the population landed"""
+    reason = "landed"
+
+    def start(self, population):
+        pass
+
+    def reached(self, population):
+        return population.evolved
+
+
+class WallClock():
+    """seconds elapsed since start"""
+    reason = "wall_clock"
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.deadline = None
+
+    def start(self, population):
+        self.deadline = time.perf_counter() + self.seconds
+
+    def reached(self, population):
+        return time.perf_counter() >= self.deadline
+
+
+class MaxGenerations():
+    """generations evolved since start"""
+    reason = "max_generations"
+
+    def __init__(self, generations):
+        self.generations = generations
+        self.first = 0
+
+    def start(self, population):
+        self.first = population.generations
+
+    def reached(self, population):
+        return population.generations - self.first >= self.generations
+
+
+class MaxSimulations():
+    """Landers flown since start, members found in the fitness cache
+    are not flown
+    """
+    reason = "max_simulations"
+
+    def __init__(self, simulations):
+        self.simulations = simulations
+        self.flown = 0
+
+    def start(self, population):
+        self.flown = 0
+
+    def reached(self, population):
+        if population.cache is not None:
+            self.flown += population.cache.last_misses
+        else:
+            self.flown += len(population.pool)
+        return self.flown >= self.simulations
+
+
+class Plateau():
+    """The best fitness did not improve by more than tolerance
+    during the last generations
+    """
+    reason = "plateau"
+
+    def __init__(self, generations, tolerance=0.0):
+        self.generations = generations
+        self.tolerance = tolerance
+        self.best = None
+        self.stalled = 0
+
+    def start(self, population):
+        self.best = None
+        self.stalled = 0
+
+    def reached(self, population):
+        fitness = population.get_max_fitness()
+        if self.best is None or fitness > self.best + self.tolerance:
+            self.best = fitness
+            self.stalled = 0
+        else:
+            self.stalled += 1
+        return self.stalled >= self.generations
+
+
+class TargetFitness():
+    """A member reached the fitness"""
+    reason = "target_fitness"
+
+    def __init__(self, fitness):
+        self.fitness = fitness
+
+    def start(self, population):
+        pass
+
+    def reached(self, population):
+        return population.get_max_fitness() >= self.fitness
+
+
+class Cancelled():
+    """cancelled() returned True, e.g. a client withdrew the job"""
+    reason = "cancelled"
+
+    def __init__(self, cancelled):
+        self.cancelled = cancelled
+
+    def start(self, population):
+        pass
+
+    def reached(self, population):
+        return self.cancelled()
+
+
+def final_state(state):
+    """JSON-serializable values of a State"""
+    return {'x': state.position.x, 'y': state.position.y,
+            'h_speed': state.speed.h_speed, 'v_speed': state.speed.v_speed,
+            'angle': state.angle, 'power': state.power, 'fuel': state.fuel}
+
+
+class Termination():
+    """Check the criteria after every generation, the first one
+    reached stops the evolution, and keep the best member seen so far
+    (a landed member beats any other one, then the highest fitness)
+    """
+    def __init__(self, criteria):
+        self.criteria = list(criteria)
+        self.reason = None
+        self.started = None
+        self.best_genes = None
+        self.best_rank = None
+        self.best_generation = None
+        self.generations = 0
+
+    def start(self, population):
+        self.started = time.perf_counter()
+        self.reason = None
+        self.best_genes = self.best_rank = self.best_generation = None
+        self.generations = 0
+        for criterion in self.criteria:
+            criterion.start(population)
+
+    def check(self, population):
+        """Reason of the first criterion reached, None to go on"""
+        self.track_best(population)
+        for criterion in self.criteria:
+            if criterion.reached(population):
+                self.reason = criterion.reason
+                return self.reason
+        self.generations += 1
+        return None
+
+    def track_best(self, population):
+        best = population.best_member()
+        landed = (bool(population.simulations) and
+                  population.simulations[best].flystate == FlyState.Landed)
+        rank = (landed, float(population.pool.fitness[best]))
+        if self.best_rank is None or rank > self.best_rank:
+            self.best_rank = rank
+            self.best_genes = population.pool.genes[best].copy()
+            self.best_generation = population.generations
+
+    def result(self, ground_points, init_position, fuel, physics="float"):
+        """Best-so-far flight: commands played every turn, final state
+        and the reason the evolution stopped
+        """
+        x, y = init_position
+        init_state = State(fuel, 0, 0, Particle(Point(x, y),
+                                                Speed(Vector(0, 0))))
+        angles, powers = genes_to_commands(self.best_genes[None])
+        commands = [ControlCommands(int(angle), int(power))
+                    for angle, power in zip(angles[0], powers[0])]
+        lander = Lander(init_state, commands,
+                        Terrain.from_inputs(ground_points), physics)
+        trajectory = lander.trajectory
+        return {'reason': self.reason,
+                'elapsed': time.perf_counter() - self.started,
+                'generations': self.generations,
+                'best_generation': self.best_generation,
+                'fitness': lander.fitness,
+                'flystate': lander.flystate.name,
+                'commands': [[state.angle, state.power]
+                             for state in trajectory[1:]],
+                'final_state': final_state(trajectory[-1]),
+                'genes': self.best_genes}
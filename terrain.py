@@ -0,0 +1,117 @@
+from plane import Point, Line
+import numpy as np
+
+MAX_X = 6999
+MIN_X = 0
+
+
+def ground_inputs_to_line(ground_points):
+    points = []
+    for point in ground_points:
+        points.append(Point(*map(int, point.split())))
+    return Line(points)
+
+
+class Terrain(Line):
+    """Ground of a scenario compiled once and shared by every lander
+    - heights: ground y for every integer x in [min_x, max_x]
+    - segments: index of the ground segment for every integer x
+      (same segment as Line.get_segment_for, -1 when there is none)
+    - landing_zone: the two points of the flat segment
+    - min_x, max_x: bounds of the map
+    It is comparable to point like Line, with a table lookup
+    instead of a scan of the ground points
+    """
+    def __init__(self, points, min_x=MIN_X, max_x=MAX_X):
+        super().__init__(points)
+        self.min_x = min_x
+        self.max_x = max_x
+        self.points_x = np.array([p.x for p in points], dtype=float)
+        self.points_y = np.array([p.y for p in points], dtype=float)
+        # a segment is horizontal when both points share the same y
+        self.horizontal = self.points_y[:-1] == self.points_y[1:]
+
+        self.landing_index = -1
+        self.landing_zone = None
+        flat = np.flatnonzero(self.horizontal)
+        if len(flat) > 0:
+            self.landing_index = int(flat[0])
+            self.landing_zone = (points[flat[0]], points[flat[0] + 1])
+
+        self.xs = np.arange(min_x, max_x + 1, dtype=float)
+        self.segments = self.scan_segments(self.xs)
+        self.heights = self.interpolate(self.xs, self.segments)
+        # plain lists for fast lookups of a single x
+        self.segment_list = self.segments.tolist()
+        self.height_list = self.heights.tolist()
+        self.horizontal_list = self.horizontal.tolist()
+
+    @classmethod
+    def from_inputs(cls, ground_points, min_x=MIN_X, max_x=MAX_X):
+        """Build from the game inputs, e.g. ["0 100", "1000 500", ...]"""
+        return cls(ground_inputs_to_line(ground_points).points, min_x, max_x)
+
+    def scan_segments(self, x):
+        """Vectorized Line.get_segment_for: first segment holding x"""
+        segments = np.full(np.shape(x), -1, dtype=np.int64)
+        for i in range(len(self.points) - 1):
+            found = ((segments == -1) & (self.points_x[i] <= x)
+                     & (x <= self.points_x[i + 1]))
+            segments[found] = i
+        return segments
+
+    def interpolate(self, x, segments):
+        """Vectorized Line.get_y_for_x, NaN where there is no segment"""
+        y = np.full(np.shape(x), np.nan)
+        valid = segments >= 0
+        s, xv = segments[valid], x[valid]
+        x0, y0 = self.points_x[s], self.points_y[s]
+        x1, y1 = self.points_x[s + 1], self.points_y[s + 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            y[valid] = y0 + (xv - x0) * (y1 - y0) / (x1 - x0)
+        return y
+
+    def in_table(self, x):
+        return bool(np.all((x == np.floor(x)) & (x >= self.min_x)
+                           & (x <= self.max_x)))
+
+    def segment_indices(self, x):
+        """Index of the ground segment for every x of an array"""
+        x = np.asarray(x, dtype=float)
+        if self.in_table(x):
+            return self.segments[(x - self.min_x).astype(np.int64)]
+        return self.scan_segments(x)
+
+    def heights_at(self, x):
+        """Ground y for every x of an array"""
+        x = np.asarray(x, dtype=float)
+        if self.in_table(x):
+            return self.heights[(x - self.min_x).astype(np.int64)]
+        return self.interpolate(x, self.scan_segments(x))
+
+    def segment_index(self, x):
+        """Index of the ground segment for a single x, -1 if none"""
+        if x == int(x) and self.min_x <= x <= self.max_x:
+            return self.segment_list[int(x) - self.min_x]
+        return int(self.scan_segments(np.array(float(x))))
+
+    def is_outside(self, x):
+        return x > self.max_x or x < self.min_x
+
+    def get_segment_for(self, x):
+        segment = self.segment_index(x)
+        if segment < 0:
+            return None
+        return (self.points[segment], self.points[segment + 1])
+
+    def is_horizontal_at_x(self, x):
+        return self.horizontal_list[self.segment_index(x)]
+
+    def get_y_for_x(self, x):
+        if x == int(x) and self.min_x <= x <= self.max_x:
+            y = self.height_list[int(x) - self.min_x]
+        else:
+            y = float(self.heights_at(np.array([x]))[0])
+        if y != y:
+            raise ValueError(f'No ground segment for x={x}!')
+        return y
@@ -0,0 +1,38 @@
+from controller import Controller
+from chromosome import GenePool
+from engine import genes_to_commands
+from scenarios import SCENARIOS
+import numpy as np
+
+
+def test_first_command_starts_from_state():
+    genes = np.array([[[60, 4], [75, 4]]])
+    angles, powers = genes_to_commands(genes, (45, 3))
+    assert angles.tolist() == [[60, 75]]
+    assert powers.tolist() == [[4, 4]]
+    angles, powers = genes_to_commands(genes)
+    assert angles.tolist() == [[15, 75]]
+
+
+def test_decide_keeps_a_steep_angle():
+    scenario = SCENARIOS["default"]
+    controller = Controller(scenario.ground_points, gene_size=20,
+                            pop_size=10, first_budget=0, seed=1)
+    controller.population.pool.genes[:] = (45, 4)
+    controller.population.pool.shift()
+    state = Controller.state_from_inputs(2500, 2700, 0, 0, 5000, 45, 4)
+    command = controller.decide(state)
+    assert (command.angle, command.power) == (45, 4)
+
+
+def test_crossover_blends_first_gene_after_shift():
+    genes = np.zeros((2, 5, 2), dtype=np.int8)
+    genes[0] = (30, 2)
+    genes[1] = (60, 4)
+    pool = GenePool(genes)
+    children = pool.crossover(np.array([0]), np.array([1]), rng=1)
+    assert (children.genes[:, 0] == 0).all()
+    pool.shift()
+    children = pool.crossover(np.array([0]), np.array([1]), rng=1)
+    assert (children.genes[:, 0, 0] >= 30).all()
+    assert children.first == 0
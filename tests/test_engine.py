@@ -0,0 +1,108 @@
+from lander import Lander, State, ControlCommands, FlyState
+from plane import Point, Vector
+from motion import Speed, Particle
+from terrain import Terrain
+from chromosome import GenePool
+from engine import BatchEngine, genes_to_commands
+from scenarios import SCENARIOS
+import numpy as np
+import pytest
+
+
+def init_state(x, y, fuel):
+    return State(fuel, 0, 0, Particle(Point(x, y), Speed(Vector(0, 0))))
+
+
+def assert_same_verdicts(state, ground_points, angles, powers):
+    """Lander and BatchEngine agree on every flight"""
+    terrain = Terrain.from_inputs(ground_points)
+    result = BatchEngine(terrain).simulate(state, angles, powers)
+    for i in range(len(angles)):
+        commands = [ControlCommands(int(angle), int(power))
+                    for angle, power in zip(angles[i], powers[i])]
+        lander = Lander(state, commands, terrain)
+        assert FlyState(result.flystate[i]) == lander.flystate
+        assert result.fitness[i] == lander.fitness
+        assert result.lengths[i] == lander.ticks + 1
+
+
+@pytest.mark.parametrize("name", sorted(SCENARIOS))
+def test_random_members(name):
+    scenario = SCENARIOS[name]
+    genes = GenePool.random(20, 120, rng=1).genes
+    angles, powers = genes_to_commands(genes)
+    assert_same_verdicts(init_state(*scenario.init_position, scenario.fuel),
+                         scenario.ground_points, angles, powers)
+
+
+@pytest.mark.parametrize("fall", [8, 10, 12])
+def test_safe_landing(fall):
+    # free fall, then full thrust down to the landing zone
+    scenario = SCENARIOS["straight_down"]
+    angles = np.zeros((1, 200), dtype=np.int64)
+    powers = np.full((1, 200), 4, dtype=np.int64)
+    powers[0, :fall] = 0
+    state = init_state(*scenario.init_position, scenario.fuel)
+    assert_same_verdicts(state, scenario.ground_points, angles, powers)
+    lander = Lander(state, [ControlCommands(0, int(power))
+                            for power in powers[0]],
+                    Terrain.from_inputs(scenario.ground_points))
+    assert lander.flystate == FlyState.Landed
+    assert lander.fitness == 1.0
+
+
+def test_landing_zone_corner():
+    # the state before the crash is exactly on the landing zone corner
+    scenario = SCENARIOS["straight_down"]
+    angles = np.zeros((1, 5), dtype=np.int64)
+    powers = np.zeros((1, 5), dtype=np.int64)
+    assert_same_verdicts(init_state(2000, 500, scenario.fuel),
+                         scenario.ground_points, angles, powers)
+
+
+@pytest.mark.parametrize("physics", ["float", "fixed"])
+def test_commands_flown(physics):
+    scenario = SCENARIOS["default"]
+    commands = [ControlCommands(0, 0)] * 500
+    lander = Lander(init_state(*scenario.init_position, scenario.fuel),
+                    iter(commands), Terrain.from_inputs(
+                        scenario.ground_points), physics)
+    assert lander.flystate == FlyState.Crashed
+    assert lander.commands == commands[:lander.ticks]
+    assert len(lander.trajectory) == lander.ticks + 1
+
+
+def reference_flight(state, commands, terrain):
+    """States and verdict of compute_trajectory, the reference physics"""
+    lander = Lander(state, commands, terrain)
+    lander.flystate = FlyState.Flying
+    lander.commands = list(commands)
+    lander.trajectory = [state]
+    lander.compute_trajectory()
+    return lander.trajectory, lander.flystate
+
+
+@pytest.mark.parametrize("name", sorted(SCENARIOS))
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_integrate_matches_compute_trajectory(name, seed):
+    scenario = SCENARIOS[name]
+    terrain = Terrain.from_inputs(scenario.ground_points)
+    state = init_state(*scenario.init_position, scenario.fuel)
+    angles, powers = genes_to_commands(
+        GenePool.random(10, 120, rng=seed).genes)
+    for i in range(len(angles)):
+        commands = [ControlCommands(int(angle), int(power))
+                    for angle, power in zip(angles[i], powers[i])]
+        lander = Lander(state, commands, terrain)
+        trajectory, flystate = reference_flight(state, commands, terrain)
+        assert lander.flystate == flystate
+        assert len(lander.trajectory) == len(trajectory)
+        for got, expected in zip(lander.trajectory, trajectory):
+            assert (got.position.x, got.position.y) == (
+                expected.position.x, expected.position.y)
+            assert (got.speed.direction.dx, got.speed.direction.dy) == (
+                expected.speed.direction.dx, expected.speed.direction.dy)
+            assert (got.speed.h_speed, got.speed.v_speed) == (
+                expected.speed.h_speed, expected.speed.v_speed)
+            assert (got.angle, got.power, got.fuel) == (
+                expected.angle, expected.power, expected.fuel)
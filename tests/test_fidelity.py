@@ -0,0 +1,28 @@
+from fidelity import discordant_pairs, count_inversions
+import numpy as np
+import pytest
+
+
+def pairwise_discordance(coarse, exact):
+    n = len(coarse)
+    order_coarse = np.sign(coarse[:, None] - coarse[None, :])
+    order_exact = np.sign(exact[:, None] - exact[None, :])
+    return np.count_nonzero(order_coarse * order_exact < 0) / (n * (n - 1))
+
+
+@pytest.mark.parametrize("n", [2, 3, 8, 9, 100, 257])
+def test_discordant_pairs(n):
+    rng = np.random.default_rng(n)
+    for coarse, exact in ((rng.random(n), rng.random(n)),
+                          # many ties
+                          (rng.integers(0, 4, n).astype(float),
+                           rng.integers(0, 4, n).astype(float))):
+        assert discordant_pairs(coarse, exact) == pytest.approx(
+            pairwise_discordance(coarse, exact))
+
+
+def test_discordant_pairs_extremes():
+    assert discordant_pairs([1, 2, 3], [1, 2, 3]) == 0.0
+    assert discordant_pairs([1, 2, 3], [3, 2, 1]) == 1.0
+    assert discordant_pairs([1], [2]) == 0.0
+    assert count_inversions([3, 1, 2, 2]) == 3
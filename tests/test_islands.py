@@ -0,0 +1,14 @@
+from islands import IslandRunner
+from scenarios import SCENARIOS
+import pytest
+
+
+def test_failed_island_raises():
+    scenario = SCENARIOS["default"]
+    runner = IslandRunner(3, 60, 0.08, 40,
+                          overrides=[{'selection_strategy': "unknown"},
+                                     {}, {}],
+                          max_generations=50)
+    with pytest.raises(RuntimeError, match="Island 0 failed"):
+        runner.run(scenario.init_position, scenario.fuel,
+                   scenario.ground_points)
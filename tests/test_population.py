@@ -0,0 +1,69 @@
+from population import Population
+from cache import FitnessCache, Outcome
+from scenarios import SCENARIOS
+import numpy as np
+import pytest
+
+
+def fly(population, scenario):
+    population.simulate(scenario.init_position, scenario.fuel,
+                        scenario.ground_points)
+    population.calculate_fitness()
+
+
+def test_incremental_same_generation_twice():
+    # the checkpoints of a generation are not the ones of its parents
+    scenario = SCENARIOS["default"]
+    population = Population(100, 0.08, 200, rng=5)
+    population.engine = "batch"
+    population.checkpoint_every = 10
+    fly(population, scenario)
+    for _ in range(3):
+        population.selection()
+        population.next_generation()
+        fly(population, scenario)
+    assert population.incremental_stats['resumed'] > 0
+    fly(population, scenario)
+    fitness = population.pool.fitness.copy()
+    population.checkpoint_every = None
+    fly(population, scenario)
+    np.testing.assert_array_equal(fitness, population.pool.fitness)
+
+
+def test_live_of_screened_members():
+    # members only flown coarsely keep every gene live
+    scenario = SCENARIOS["default"]
+    population = Population(100, 0.08, 200, rng=3)
+    population.engine = "batch"
+    population.screening = "step"
+    population.screening_audit = 0
+    fly(population, scenario)
+    live = population.pool.live.copy()
+    screened_out = population.screened_out
+    assert len(screened_out) > 0
+    assert (live[screened_out] == population.gene_size).all()
+    population.screening = None
+    fly(population, scenario)
+    flown = np.setdiff1d(np.arange(200), screened_out)
+    np.testing.assert_array_equal(live[flown], population.pool.live[flown])
+
+
+@pytest.mark.parametrize("engine", ["object", "batch"])
+def test_cache_keeps_scalar_outcomes(engine):
+    scenario = SCENARIOS["default"]
+    runs = []
+    for cache in (None, FitnessCache(1000)):
+        population = Population(60, 0.08, 50, rng=4)
+        population.engine = engine
+        population.cache = cache
+        fitness = []
+        for _ in range(4):
+            fly(population, scenario)
+            fitness.append(population.pool.fitness.copy())
+            population.selection()
+            population.next_generation()
+        runs.append(fitness)
+    np.testing.assert_array_equal(runs[0], runs[1])
+    assert cache.hits > 0
+    assert all(isinstance(outcome, Outcome)
+               for outcome in cache.entries.values())
@@ -0,0 +1,29 @@
+from runner import make_job, solve
+import pytest
+
+
+def test_null_time_budget():
+    job = make_job({'scenario': "default", 'seed': 1, 'pop_size': 20,
+                    'gene_size': 40, 'time_budget': None,
+                    'max_generations': 3})
+    result = solve(job)
+    assert result['status'] == "max_generations"
+    assert result['generations'] == 3
+
+
+@pytest.mark.parametrize('fields', [
+    {'pop_size': 'x'}, {'pop_size': 3.5}, {'pop_size': True},
+    {'mutation_rate': 2}, {'selection_strategy': 'nope'},
+    {'physics': 'exact'}, {'seed': 'a'}, {'init_position': [1]},
+    {'ground_points': ['0 100 3']}])
+def test_make_job_rejects_bad_fields(fields):
+    with pytest.raises(ValueError, match=list(fields)[0].split('_')[0]):
+        make_job({'scenario': 'default', **fields})
+
+
+def test_make_job_coerces_numbers():
+    job = make_job({'scenario': 'default', 'pop_size': '50',
+                    'mutation_rate': '0.1', 'max_generations': 5.0})
+    assert (job['pop_size'], job['mutation_rate'],
+            job['max_generations']) == (50, 0.1, 5)
+    assert isinstance(job['max_generations'], int)
@@ -0,0 +1,38 @@
+from service import EvaluationService, ServiceClient
+import asyncio
+import pytest
+
+SMALL = {'scenario': 'default', 'seed': 1, 'pop_size': 20, 'gene_size': 40,
+         'max_generations': 3, 'time_budget': None}
+
+
+async def session():
+    service = await EvaluationService(workers=2, queue_size=4).start()
+    client = await ServiceClient.connect(port=service.port)
+    try:
+        job_id = await client.submit(SMALL)
+        events = [event async for event in client.events(job_id)]
+        long_id = await client.submit({'scenario': 'default', 'seed': 2,
+                                       'time_budget': 30})
+        await client.cancel(long_id)
+        cancelled = await client.result(long_id)
+        with pytest.raises(RuntimeError, match='pop_size'):
+            await client.submit({'scenario': 'default', 'pop_size': 'x'})
+        status = await client.status()
+    finally:
+        await service.stop()
+        await client.close()
+    return events, cancelled, status
+
+
+def test_service_end_to_end():
+    events, cancelled, status = asyncio.run(
+        asyncio.wait_for(session(), 60))
+    *progress, result = events
+    # progress travels apart from results, the last one may come after
+    generations = [event['generation'] for event in progress]
+    assert generations == sorted(generations)
+    assert set(generations) <= {0, 1, 2, 3}
+    assert result['result']['status'] == 'max_generations'
+    assert cancelled['status'] == 'cancelled'
+    assert status['running'] == 0 and status['queued'] == 0
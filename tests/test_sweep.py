@@ -0,0 +1,14 @@
+from sweep import Sweep
+
+
+def test_table_columns_aligned():
+    config = {'mutation_rate': 0.04, 'pop_size': 20}
+    sweep = Sweep({name: [value] for name, value in config.items()})
+    sweep.rows = [{'config': config, 'rung': 0, 'budget': 20,
+                   'success_rate': 0.0, 'time_to_landing': None,
+                   'generations_to_landing': None, 'fitness': 0.5,
+                   'trials': 3}]
+    header, row = sweep.table().splitlines()
+    assert len(header) == len(row)
+    assert header.index('mutation_rate') + len('mutation_rate') == (
+        row.index('0.04') + len('0.04'))